@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Import-time benchmark
+Measures how long importing each compiler module takes in a fresh
+interpreter and fails when a module is over the start-up budget or pulls
+in a heavy library at import time.
+
+Usage:
+    python benchmarks/bench_import_time.py [budget_ms] [repeats]
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["compiler_core", "compiler_gui", "compiler_cli", "compiler_server"]
+# Must only be imported when a script actually runs
+HEAVY = ["pandas", "numpy", "matplotlib", "seaborn", "pyarrow"]
+DEFAULT_BUDGET_MS = 300
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(elapsed, ",".join(heavy))
+"""
+
+
+def measure(module, repeats):
+    """
+    Best import time (s) of module over fresh interpreters, and the heavy
+    libraries it imported.
+    """
+    statement = f"import {module}"
+    best, heavy = None, ""
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(statement=statement, heavy=HEAVY)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.split()
+        elapsed = float(out[0])
+        heavy = out[1] if len(out) > 1 else ""
+        best = elapsed if best is None else min(best, elapsed)
+    return best, heavy
+
+
+def main():
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_MS
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    print(f"Import time over {repeats} fresh interpreters (budget {budget_ms:.0f} ms)")
+    print("-" * 60)
+    print(f"{'module':<20}{'best (ms)':>12}  heavy imports")
+    failures = []
+    for module in MODULES:
+        try:
+            best, heavy = measure(module, repeats)
+        except subprocess.CalledProcessError as e:
+            # e.g. tkinter missing on a headless machine
+            print(f"{module:<20}{'-':>12}  (not importable: {e.stderr.strip().splitlines()[-1]})")
+            continue
+        print(f"{module:<20}{best * 1000:>12.1f}  {heavy or '-'}")
+        if best * 1000 > budget_ms:
+            failures.append(f"{module} takes {best * 1000:.0f} ms")
+        if heavy:
+            failures.append(f"{module} imports {heavy}")
+
+    if failures:
+        print("\nFAILED: " + "; ".join(failures))
+        return 1
+    print("\nOK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Parse-setup benchmark
+Compares the cost of getting a ready LALR parser:
+  - before: Lark(grammar, parser="lalr") on every compile
+  - cold:   new process, tables loaded from the on-disk cache
+  - warm:   process-wide singleton (get_parser)
+
+Usage:
+    python benchmarks/bench_parser_startup.py [repeats]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compiler_core  # noqa: E402
+
+
+def measure(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), sum(timings) / len(timings)
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    # Make sure the disk cache exists before timing the cold path,
+    # and the singleton is built before timing the warm path
+    compiler_core.build_parser(use_cache=True)
+    compiler_core.get_parser()
+
+    def singleton():
+        compiler_core.get_parser()
+
+    rows = [
+        ("before (no cache)", measure(lambda: compiler_core.build_parser(use_cache=False), repeats)),
+        ("cold (disk cache)", measure(lambda: compiler_core.build_parser(use_cache=True), repeats)),
+        ("warm (singleton)", measure(singleton, repeats)),
+    ]
+
+    print(f"Parse setup over {repeats} runs")
+    print(f"cache file: {compiler_core.parser_cache_path()}")
+    print("-" * 50)
+    print(f"{'mode':<20}{'best (ms)':>14}{'mean (ms)':>14}")
+    for name, (best, mean) in rows:
+        print(f"{name:<20}{best * 1000:>14.3f}{mean * 1000:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+End-to-end pipeline benchmark
+Generates synthetic lab data (benchmarks/datagen.py) at the requested
+sizes, runs the benchmark DSL scripts on it in a fresh process per run and
+records throughput, peak RSS and per-stage times to JSON. With --baseline
+the results are compared with an earlier JSON file and the exit status is
+1 when a case got slower than the tolerance allows.
+
+Usage:
+    python benchmarks/bench_pipeline.py --rows 1e5 1e6 --out bench_results.json
+    python benchmarks/bench_pipeline.py --rows 1e6 --scripts pipeline --langs fa --repeats 3
+    python benchmarks/bench_pipeline.py --rows 1e6 --baseline old.json --tolerance 0.15
+
+Scripts live in benchmarks/scripts as <name>_<lang>.txt and load
+"bench.csv"; the runner points that at the generated file.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+import compiler_cli  # noqa: E402
+import datagen  # noqa: E402
+
+SCRIPTS_DIR = os.path.join(HERE, "scripts")
+# Data variant each script needs (all_statements uses the wide columns)
+SCRIPTS = {"pipeline": "base", "all_statements": "wide"}
+LANGS = ["en", "fa"]
+# Stages whose time scales with the data rather than the script
+DATA_STAGES = ("execute", "plots")
+
+# =====================================================
+# 1. Data and jobs
+# =====================================================
+
+def dataset(data_dir, variant, rows, seed, fmt):
+    """
+    Path of the generated dataset, generating it on first use.
+    """
+    path = os.path.join(data_dir, f"{variant}_{rows}_s{seed}.{fmt}")
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        datagen.generate(path, rows, seed, variant)
+        print(f"generated {path} in {time.perf_counter() - start:.1f} s")
+    return path
+
+
+def make_jobs(scripts, langs, rows_list, repeats, data_dir, seed, fmt):
+    jobs, cases = [], []
+    for rows in rows_list:
+        for script in scripts:
+            variant = SCRIPTS[script]
+            data = dataset(data_dir, variant, rows, seed, fmt)
+            for lang in langs:
+                with open(os.path.join(SCRIPTS_DIR, f"{script}_{lang}.txt"), "r", encoding="utf-8") as f:
+                    code = f.read().replace('"bench.csv"', f'"{os.path.basename(data)}"')
+                case = {"script": script, "lang": lang, "variant": variant, "rows": rows,
+                        "input_mb": os.path.getsize(data) / 1024 ** 2}
+                for repeat in range(repeats):
+                    jobs.append({"name": f"{script}_{lang}_{rows}_r{repeat}", "code": code,
+                                 "cwd": os.path.dirname(data)})
+                    cases.append(case)
+    return jobs, cases
+
+
+# =====================================================
+# 2. Results
+# =====================================================
+
+def case_key(case):
+    return f"{case['script']}/{case['lang']}/{case['variant']}/{case['rows']}"
+
+
+def collect(jobs, cases, rows):
+    """
+    One result per case: the fastest successful repeat, plus all timings.
+    """
+    results = {}
+    for job, case, row in zip(jobs, cases, rows):
+        result = results.setdefault(case_key(case), dict(case, success=True, error="", runs=[]))
+        if not row["success"]:
+            result["success"] = False
+            result["error"] = ((row["error"] or "").strip().splitlines() or [""])[-1]
+            continue
+        seconds = round(row["seconds"], 3)
+        result["runs"].append(seconds)
+        if seconds > min(result["runs"]):
+            continue
+        data_seconds = sum(row["timings"].get(stage, 0) for stage in DATA_STAGES)
+        result.update({
+            "seconds": seconds,
+            "rows_per_s": round(case["rows"] / data_seconds) if data_seconds else None,
+            "mb_per_s": round(case["input_mb"] / data_seconds, 2) if data_seconds else None,
+            "peak_mb": round(row["peak_mb"], 1) if row["peak_mb"] is not None else None,
+            "stages": {stage: round(seconds, 4) for stage, seconds in row["timings"].items()},
+        })
+    return list(results.values())
+
+
+def environment():
+    import numpy
+    import pandas
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pandas.__version__,
+        "numpy": numpy.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def format_results(results):
+    lines = [f"{'case':<36}{'seconds':>9}{'rows/s':>14}{'MB/s':>9}{'peak MB':>9}  slowest stage"]
+    for r in results:
+        if not r["success"]:
+            lines.append(f"{case_key(r):<36}  FAILED  {r['error']}")
+            continue
+        stage = max(r["stages"], key=r["stages"].get)
+        rate = f"{r['rows_per_s']:,}" if r["rows_per_s"] else "-"
+        mb_rate = f"{r['mb_per_s']:.1f}" if r["mb_per_s"] else "-"
+        peak = f"{r['peak_mb']:.0f}" if r["peak_mb"] is not None else "-"
+        lines.append(f"{case_key(r):<36}{r['seconds']:>9.2f}{rate:>14}{mb_rate:>9}{peak:>9}  "
+                     f"{stage} {r['stages'][stage]:.2f} s")
+    return "\n".join(lines)
+
+
+def compare(results, baseline, tolerance):
+    """
+    Prints new vs baseline wall time per case.
+
+    Returns:
+        list: keys of the cases slower than baseline * (1 + tolerance)
+    """
+    old = {case_key(r): r for r in baseline["results"] if r.get("success")}
+    regressions = []
+    print(f"\nCompared with {baseline['environment'].get('commit') or 'baseline'} "
+          f"(tolerance {tolerance:.0%})")
+    print(f"{'case':<36}{'before':>9}{'after':>9}{'ratio':>8}{'peak MB':>16}")
+    for r in results:
+        key = case_key(r)
+        if key not in old or not r["success"]:
+            continue
+        ratio = r["seconds"] / old[key]["seconds"]
+        peak = f"{old[key].get('peak_mb') or 0:.0f} -> {r['peak_mb'] or 0:.0f}"
+        flag = "  SLOWER" if ratio > 1 + tolerance else ""
+        print(f"{key:<36}{old[key]['seconds']:>9.2f}{r['seconds']:>9.2f}{ratio:>8.2f}{peak:>16}{flag}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+# =====================================================
+# 3. Main
+# =====================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark DSL scripts on synthetic lab data.")
+    parser.add_argument("--rows", nargs="+", type=datagen.parse_rows, default=[100_000, 1_000_000])
+    parser.add_argument("--scripts", nargs="+", choices=sorted(SCRIPTS), default=sorted(SCRIPTS))
+    parser.add_argument("--langs", nargs="+", choices=LANGS, default=LANGS)
+    parser.add_argument("--repeats", type=int, default=1, help="runs per case (the fastest is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="generated file type")
+    parser.add_argument("--data-dir", default="bench_data", help="generated datasets are kept here")
+    parser.add_argument("--out-dir", default="bench_runs", help="run directories")
+    parser.add_argument("--plot-workers", type=int, default=1)
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", help="earlier results JSON to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slow-down before failing")
+    args = parser.parse_args(argv)
+
+    jobs, cases = make_jobs(args.scripts, args.langs, args.rows, max(1, args.repeats),
+                            os.path.abspath(args.data_dir), args.seed, args.format)
+    # Plot cache off, so repeats measure rendering too; one job at a time,
+    # each in a fresh process, so runs don't compete and peak RSS is per run
+    options = {"plot_workers": args.plot_workers, "plot_cache": False}
+    rows = compiler_cli.run_batch(jobs, args.out_dir, 1, options)
+
+    results = collect(jobs, cases, rows)
+    report = {"environment": environment(), "seed": args.seed, "format": args.format,
+              "options": options, "results": results}
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(format_results(results))
+    print(f"\nResults written to {args.out}")
+
+    status = 0 if all(r["success"] for r in results) else 1
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            if compare(results, json.load(f), args.tolerance):
+                status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
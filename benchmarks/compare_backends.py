@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+pandas vs Polars backend check
+Runs the benchmark DSL scripts on generated data with both backends and
+checks that they agree: both succeed, write the same report (timestamps,
+runtimes and timings aside) and SAVE the same rows. Row order is ignored,
+since Polars may order rows differently where pandas does not define it.
+Prints the wall time and peak RSS of each backend; the exit status is 1
+when the backends disagree or the Polars runs did not use Polars.
+Statement-level parity on edge cases is in tests/test_polars_backend.py.
+
+Usage:
+    python benchmarks/compare_backends.py --rows 1e5
+    python benchmarks/compare_backends.py --rows 1e6 --scripts pipeline --langs fa
+"""
+
+import argparse
+import os
+import re
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import pandas as pd  # noqa: E402
+
+import bench_pipeline  # noqa: E402
+import compiler_cli  # noqa: E402
+import datagen  # noqa: E402
+
+BACKENDS = ["pandas", "polars"]
+# Report lines that differ between any two runs
+VOLATILE = re.compile(r"^(Runtime|Timestamp): ")
+SAVE_PATH = re.compile(r'^\s*(?:SAVE|ذخیره)\s+\S+\s+(?:TO|:\s*در)\s+"([^"]+)"', re.MULTILINE)
+
+# =====================================================
+# 1. Normalization
+# =====================================================
+
+def report_blocks(run_dir):
+    """
+    report.txt without volatile lines and the timing section; paths into
+    the run directory are made relative.
+    """
+    with open(os.path.join(run_dir, "report.txt"), "r", encoding="utf-8") as f:
+        text = f.read().replace(run_dir + os.sep, "")
+    text = text.split("=" * 50 + "\nزمان‌بندی مراحل", 1)[0]
+    return [line for line in text.splitlines() if not VOLATILE.match(line)]
+
+
+def read_output(path):
+    if path.lower().endswith(".parquet"):
+        return pd.read_parquet(path)
+    if path.lower().endswith((".feather", ".arrow")):
+        return pd.read_feather(path)
+    if path.lower().endswith(".csv"):
+        return pd.read_csv(path)
+    return pd.read_excel(path)
+
+
+def normalize(df):
+    """
+    Backend-neutral copy: categoricals as strings, numbers as floats,
+    datetimes without unit or time zone, rows sorted.
+    """
+    df = df.copy()
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype(object)
+        if pd.api.types.is_datetime64_any_dtype(series):
+            series = pd.to_datetime(series).astype("datetime64[ns]")
+        elif pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+            series = series.astype("float64").round(9)
+        else:
+            series = series.astype(object).where(series.notna(), None).map(
+                lambda v: v if v is None else str(v))
+        df[col] = series
+    return df.sort_values(list(df.columns), na_position="last", ignore_index=True)
+
+
+def diff_outputs(left_dir, right_dir, filenames):
+    problems = []
+    for name in filenames:
+        paths = [os.path.join(left_dir, name), os.path.join(right_dir, name)]
+        missing = [p for p in paths if not os.path.exists(p)]
+        if missing:
+            problems.append(f"{name}: missing {', '.join(missing)}")
+            continue
+        left, right = (normalize(read_output(p)) for p in paths)
+        if list(left.columns) != list(right.columns):
+            problems.append(f"{name}: columns {list(left.columns)} vs {list(right.columns)}")
+            continue
+        if len(left) != len(right):
+            problems.append(f"{name}: {len(left)} vs {len(right)} rows")
+            continue
+        try:
+            pd.testing.assert_frame_equal(left, right, check_dtype=False, rtol=1e-6)
+        except AssertionError as e:
+            problems.append(f"{name}: {str(e).splitlines()[0]}")
+    return problems
+
+
+def used_polars(run_dir):
+    # compile_run falls back to pandas when Polars is not installed
+    with open(os.path.join(run_dir, "log.txt"), "r", encoding="utf-8") as f:
+        return "Backend: polars, " in f.read()
+
+
+def diff_reports(left_dir, right_dir):
+    left, right = report_blocks(left_dir), report_blocks(right_dir)
+    for index, (a, b) in enumerate(zip(left, right)):
+        if a != b:
+            return [f"report line {index + 1}: {a!r} vs {b!r}"]
+    if len(left) != len(right):
+        return [f"report: {len(left)} vs {len(right)} lines"]
+    return []
+
+
+# =====================================================
+# 2. Main
+# =====================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the Polars backend against pandas.")
+    parser.add_argument("--rows", nargs="+", type=datagen.parse_rows, default=[100_000])
+    parser.add_argument("--scripts", nargs="+", choices=sorted(bench_pipeline.SCRIPTS),
+                        default=sorted(bench_pipeline.SCRIPTS))
+    parser.add_argument("--langs", nargs="+", choices=bench_pipeline.LANGS, default=bench_pipeline.LANGS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="generated file type")
+    parser.add_argument("--data-dir", default="bench_data", help="generated datasets are kept here")
+    parser.add_argument("--out-dir", default="bench_runs/backends", help="run directories")
+    args = parser.parse_args(argv)
+
+    jobs, cases = bench_pipeline.make_jobs(args.scripts, args.langs, args.rows, 1,
+                                           os.path.abspath(args.data_dir), args.seed, args.format)
+    rows = {}
+    for backend in BACKENDS:
+        options = {"plot_workers": 1, "plot_cache": False, "backend": backend}
+        rows[backend] = compiler_cli.run_batch(jobs, os.path.join(args.out_dir, backend), 1, options)
+
+    status = 0
+    print(f"{'case':<36}{'pandas s':>10}{'polars s':>10}{'peak MB':>16}  result")
+    for index, (job, case) in enumerate(zip(jobs, cases)):
+        left, right = rows["pandas"][index], rows["polars"][index]
+        problems = [f"{backend} failed: {((row['error'] or '').strip().splitlines() or [''])[-1]}"
+                    for backend, row in zip(BACKENDS, (left, right)) if not row["success"]]
+        if not problems and not used_polars(right["run_dir"]):
+            problems = ["the polars run fell back to pandas (is polars installed?)"]
+        if not problems:
+            saved = SAVE_PATH.findall(job["code"])
+            problems = (diff_reports(left["run_dir"], right["run_dir"])
+                        + diff_outputs(left["run_dir"], right["run_dir"], saved))
+        seconds = [f"{row['seconds']:.2f}" if row["seconds"] is not None else "-" for row in (left, right)]
+        peak = f"{left['peak_mb'] or 0:.0f} -> {right['peak_mb'] or 0:.0f}"
+        print(f"{bench_pipeline.case_key(case):<36}{seconds[0]:>10}{seconds[1]:>10}{peak:>16}  "
+              + ("same" if not problems else "DIFFERENT"))
+        for problem in problems:
+            print(f"    {problem}")
+        if problems:
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
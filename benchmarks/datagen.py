@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic lab-data generator
+Writes seeded, reproducible datasets with the lab_data.csv schema
+(id,gender,age,glucose,cholesterol) at any size, in chunks so 10^8 rows
+never have to fit in memory. Wide variants add a visit date, a free-text
+note and extra lab columns; nulls, duplicate rows and outliers are
+injected at configurable rates.
+
+Usage:
+    python benchmarks/datagen.py bench.csv --rows 1e6 [--variant wide] [--seed 7]
+    python benchmarks/datagen.py bench.parquet --rows 1e7 --nulls 0.1
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+BASE_COLUMNS = ["id", "gender", "age", "glucose", "cholesterol"]
+CHUNK_ROWS = 1_000_000
+NOTES = ["routine check", "fasting", "post meal", "follow up", "referred by clinic", "emergency visit"]
+FIRST_VISIT = np.datetime64("2020-01-01")
+VISIT_DAYS = 5 * 365
+
+# Injection rates are fractions of rows (duplicates) or of values (nulls, outliers)
+VARIANTS = {
+    "clean": {"wide": 0, "nulls": 0.0, "duplicates": 0.0, "outliers": 0.0},
+    "base": {"wide": 0, "nulls": 0.02, "duplicates": 0.01, "outliers": 0.005},
+    "wide": {"wide": 20, "nulls": 0.05, "duplicates": 0.02, "outliers": 0.01},
+}
+
+# Lookup table for MERGE benchmarks (written next to the dataset)
+GENDER_INFO = pd.DataFrame({"gender": ["Male", "Female"], "gender_code": ["M", "F"]})
+
+
+def lab_columns(wide):
+    return [f"lab_{i:02d}" for i in range(1, wide + 1)]
+
+
+def columns(wide=0):
+    """
+    Column names of a dataset with `wide` extra lab columns.
+    """
+    if not wide:
+        return list(BASE_COLUMNS)
+    return BASE_COLUMNS + ["visit_date", "note"] + lab_columns(wide)
+
+
+def make_chunk(rng, start_id, rows, wide=0, nulls=0.0, duplicates=0.0, outliers=0.0):
+    """
+    One DataFrame chunk; ids continue from start_id.
+    """
+    data = {
+        "id": np.arange(start_id, start_id + rows, dtype=np.int64),
+        "gender": np.where(rng.random(rows) < 0.5, "Male", "Female"),
+        "age": np.clip(rng.normal(45, 18, rows), 1, 95).round(),
+        "glucose": rng.normal(105, 15, rows).round(),
+        "cholesterol": rng.normal(200, 25, rows).round(),
+    }
+    measured = ["glucose", "cholesterol"]
+    if wide:
+        days = rng.integers(0, VISIT_DAYS, rows)
+        data["visit_date"] = np.datetime_as_string(FIRST_VISIT + days, unit="D")
+        data["note"] = np.array(NOTES)[rng.integers(0, len(NOTES), rows)]
+        for i, name in enumerate(lab_columns(wide)):
+            data[name] = rng.lognormal(1 + i % 5, 0.4, rows).round(3)
+        measured += lab_columns(wide)
+
+    for col in measured:
+        values = data[col]
+        if outliers:
+            hit = rng.random(rows) < outliers
+            values[hit] *= rng.uniform(4, 10, hit.sum())
+        if nulls:
+            values[rng.random(rows) < nulls] = np.nan
+    if nulls:
+        data["age"][rng.random(rows) < nulls] = np.nan
+
+    # Whole-row copies (id included) of other rows in the chunk
+    n = int(rows * duplicates)
+    if n:
+        target = rng.choice(rows, n, replace=False)
+        source = rng.integers(0, rows, n)
+        for values in data.values():
+            values[target] = values[source]
+    df = pd.DataFrame(data)
+
+    # Integer measures stay integers in the file (blank when missing)
+    for col in ["id", "age", "glucose", "cholesterol"]:
+        df[col] = df[col].round().astype("Int64")
+    return df
+
+
+def generate(path, rows, seed=0, variant="base", chunk_rows=CHUNK_ROWS, **overrides):
+    """
+    Writes `rows` rows to path (.csv or .parquet) plus gender_info.csv in
+    the same directory. The same seed, variant and chunk size always give
+    the same file.
+
+    Returns:
+        int: size of the written dataset in bytes
+    """
+    options = dict(VARIANTS[variant])
+    options.update({k: v for k, v in overrides.items() if v is not None})
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    GENDER_INFO.to_csv(os.path.join(directory, "gender_info.csv"), index=False)
+
+    # pyarrow writes CSV about ten times faster than DataFrame.to_csv;
+    # pandas is the fallback (parquet needs pyarrow either way)
+    parquet = path.lower().endswith(".parquet")
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pcsv
+        import pyarrow.parquet as pq
+    except ImportError:
+        if parquet:
+            raise
+        pa = None
+
+    writer = sink = None
+    try:
+        for index, start in enumerate(range(0, rows, chunk_rows)):
+            # Per-chunk streams: chunk k is the same whatever came before it
+            rng = np.random.default_rng([seed, index])
+            chunk = make_chunk(rng, start + 1, min(chunk_rows, rows - start), **options)
+            if pa is None:
+                chunk.to_csv(path, mode="w" if index == 0 else "a", header=index == 0, index=False)
+                continue
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                if parquet:
+                    writer = pq.ParquetWriter(path, table.schema)
+                else:
+                    # Unquoted, like lab_data.csv (no value contains a comma);
+                    # the header is written by hand since pyarrow quotes it
+                    sink = open(path, "wb")
+                    sink.write((",".join(chunk.columns) + "\n").encode("utf-8"))
+                    writer = pcsv.CSVWriter(sink, table.schema, write_options=pcsv.WriteOptions(
+                        include_header=False, quoting_style="none"))
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+        if sink is not None:
+            sink.close()
+    return os.path.getsize(path)
+
+
+def parse_rows(text):
+    # Accepts 1000000, 1e6 and 1_000_000
+    return int(float(text.replace("_", "")))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic lab data.")
+    parser.add_argument("path", help="output file (.csv or .parquet)")
+    parser.add_argument("--rows", type=parse_rows, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--variant", choices=sorted(VARIANTS), default="base")
+    parser.add_argument("--wide", type=int, help="extra lab columns (overrides the variant)")
+    parser.add_argument("--nulls", type=float, help="fraction of missing values")
+    parser.add_argument("--duplicates", type=float, help="fraction of duplicated rows")
+    parser.add_argument("--outliers", type=float, help="fraction of outlier values")
+    args = parser.parse_args(argv)
+
+    size = generate(args.path, args.rows, args.seed, args.variant, wide=args.wide,
+                    nulls=args.nulls, duplicates=args.duplicates, outliers=args.outliers)
+    print(f"Wrote {args.rows:,} rows ({size / 1024 ** 2:,.1f} MB) to {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Headless batch CLI
+Compiles and runs many DSL scripts without prompts, each job in its own
+process and output directory, and prints a summary table.
+
+Usage:
+    python compiler_cli.py a.txt b.txt --jobs 4 --out-dir batch_output
+    python compiler_cli.py --manifest jobs.jsonl --jobs 8
+
+Manifest lines (JSONL):
+    {"script": "batches/day1.txt"}
+    {"name": "day2", "code": "LOAD ...", "cwd": "batches"}
+
+Script jobs run in the script's directory (relative LOAD paths resolve
+against it) unless the manifest gives a cwd.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# =====================================================
+# 1. Jobs
+# =====================================================
+
+def load_jobs(scripts, manifest=None):
+    """
+    Job dicts (name, code, cwd) from script paths and/or a JSONL manifest.
+    """
+    entries = [{"script": path} for path in scripts]
+    if manifest:
+        with open(manifest, "r", encoding="utf-8") as f:
+            entries += [json.loads(line) for line in f if line.strip()]
+
+    jobs, names = [], set()
+    for entry in entries:
+        cwd = entry.get("cwd")
+        if "code" in entry:
+            code = entry["code"]
+        else:
+            with open(entry["script"], "r", encoding="utf-8") as f:
+                code = f.read()
+            cwd = cwd or os.path.dirname(os.path.abspath(entry["script"]))
+        name = entry.get("name") or os.path.splitext(os.path.basename(entry.get("script", "job")))[0]
+        # Keep run directories apart when two scripts share a file name
+        unique, n = name, 2
+        while unique in names:
+            unique, n = f"{name}_{n}", n + 1
+        names.add(unique)
+        jobs.append({"name": unique, "code": code, "cwd": os.path.abspath(cwd) if cwd else None})
+    return jobs
+
+
+def peak_memory_mb():
+    """
+    Peak resident memory of this process in MB (None where unsupported).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 ** 2 if sys.platform == "darwin" else 1024)
+
+
+def run_job(job, run_dir, options):
+    """
+    Runs one job in a worker process (a fresh one per job, so the peak
+    memory belongs to this job alone).
+    """
+    from compiler_core import compile_run
+
+    start = time.perf_counter()
+    if job["cwd"]:
+        os.chdir(job["cwd"])
+    result = compile_run(job["code"], run_dir, **options)
+    with open(os.path.join(run_dir, "log.txt"), "w", encoding="utf-8") as f:
+        f.write(result.log)
+    return {
+        "name": job["name"],
+        "success": result.success,
+        "error": result.error,
+        "seconds": time.perf_counter() - start,
+        "peak_mb": peak_memory_mb(),
+        "run_dir": run_dir,
+        "timings": result.timings,
+    }
+
+
+def _pool_context():
+    # One fresh process per job; the forkserver starts them from a process
+    # that has already imported the compiler and its libraries
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        # compiler_core defers pandas; compiler_runtime pulls it in
+        context.set_forkserver_preload(["compiler_core", "compiler_runtime"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def run_batch(jobs, out_dir, workers, options):
+    """
+    Runs the jobs across `workers` processes.
+
+    Returns:
+        list: one row dict per job, in job order
+    """
+    out_dir = os.path.abspath(out_dir)
+    # A fresh process per job needs Python 3.11+; before that, workers are
+    # reused and a job's peak memory includes the jobs before it
+    fresh = {"max_tasks_per_child": 1} if sys.version_info >= (3, 11) else {}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context(), **fresh) as pool:
+        futures = [pool.submit(run_job, job, os.path.join(out_dir, job["name"]), options) for job in jobs]
+        rows = []
+        for job, future in zip(jobs, futures):
+            try:
+                rows.append(future.result())
+            except Exception as e:
+                rows.append({"name": job["name"], "success": False, "error": f"{type(e).__name__}: {e}",
+                             "seconds": None, "peak_mb": None, "run_dir": os.path.join(out_dir, job["name"]),
+                             "timings": {}})
+    return rows
+
+
+# =====================================================
+# 2. Summary
+# =====================================================
+
+def format_summary(rows, wall_seconds):
+    lines = [f"{'job':<24}{'status':<8}{'seconds':>10}{'peak MB':>10}  output / error"]
+    for row in rows:
+        seconds = f"{row['seconds']:.2f}" if row["seconds"] is not None else "-"
+        peak = f"{row['peak_mb']:.0f}" if row["peak_mb"] is not None else "-"
+        status = "ok" if row["success"] else "FAILED"
+        detail = row["run_dir"] if row["success"] else row["error"].splitlines()[0] if row["error"] else ""
+        lines.append(f"{row['name']:<24}{status:<8}{seconds:>10}{peak:>10}  {detail}")
+    failed = sum(not row["success"] for row in rows)
+    lines.append(f"{len(rows)} jobs, {failed} failed, {wall_seconds:.2f} s wall time")
+    return "\n".join(lines)
+
+
+# =====================================================
+# 3. Main
+# =====================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile and run Persian/English DSL scripts in batch.")
+    parser.add_argument("scripts", nargs="*", help="DSL script files")
+    parser.add_argument("--manifest", help="JSONL file with one job per line")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--out-dir", default="batch_output", help="one sub-directory per job is created here")
+    parser.add_argument("--plot-workers", type=int, default=1, help="plot processes per job")
+    parser.add_argument("--no-ast", action="store_true", help="skip the AST image")
+    parser.add_argument("--trace", action="store_true", help="write a Chrome trace (trace.json) per job")
+    parser.add_argument("--no-profile", action="store_true", help="skip the per-statement runtime profile")
+    parser.add_argument("--backend", choices=["pandas", "polars"], default="pandas",
+                        help="engine the scripts run on (polars: lazy queries, pandas for the rest)")
+    args = parser.parse_args(argv)
+
+    if not args.scripts and not args.manifest:
+        parser.error("give script files or --manifest")
+
+    jobs = load_jobs(args.scripts, args.manifest)
+    options = {"plot_workers": args.plot_workers, "ast_image": None if args.no_ast else "png", "trace": args.trace,
+               "profile": not args.no_profile, "backend": args.backend}
+
+    start = time.perf_counter()
+    rows = run_batch(jobs, args.out_dir, max(1, args.jobs), options)
+    print(format_summary(rows, time.perf_counter() - start))
+    return 0 if all(row["success"] for row in rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
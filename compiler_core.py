@@ -8,12 +8,28 @@ Persian DSL Compiler
 
 import re
 import os
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from lark import Lark, Transformer
+import csv
+import mmap
+import hashlib
+import stat
+import threading
+import contextvars
+import io
+import sys
+import time
+import pickle
+import types
+import textwrap
+import json
+from contextlib import contextmanager, nullcontext
+from collections import OrderedDict
+from lark import Lark, Transformer, Tree, Token, UnexpectedInput
 from datetime import datetime
 import subprocess
+import shutil
+
+# pandas, matplotlib and compiler_runtime (numpy) are only needed to run a
+# script, so they are imported on first use: see load_runtime_modules()
 
 # =====================================================
 # 1. Persian → English DSL Mapper
@@ -22,6 +38,7 @@ import subprocess
 class PersianToDSLMapper:
     def __init__(self):
         self.rules = [
+            (r'بگیر از "([^"]+)" به نام (\w+) بهینه', r'LOAD "\1" INTO \2 OPTIMIZE'),
             (r'بگیر از "([^"]+)" به نام (\w+)', r'LOAD "\1" INTO \2'),
             (r'خلاصه (\w+)', r'DESCRIBE \1'),
             (r'نمایش (\w+) : (\d+) سطر اول', r'HEAD \1 \2'),
@@ -29,15 +46,18 @@ class PersianToDSLMapper:
             (r'پاکسازی (\w+) : حذف تکراری', r'CLEAN \1 DROP_DUPLICATES'),
             (r'پاکسازی (\w+) : حذف کلی (خالی|پرت)', r'CLEAN \1 DROP_ALL \2'),
             (r'پاکسازی (\w+) : حذف (\w+) (خالی|پرت)', r'CLEAN \1 DROP_SPECIFIC \2 \3'),
+            (r'پاکسازی (\w+) : جایگزینی کلی (خالی|پرت) با (میانگین|مد) ذخیره_در "([^"]+)"', r'CLEAN \1 FILL_ALL \2 \3 SAVE_FIT "\4"'),
+            (r'پاکسازی (\w+) : جایگزینی کلی (خالی|پرت) با مقادیر "([^"]+)"', r'CLEAN \1 FILL_ALL \2 mean USE_FIT "\3"'),
             (r'پاکسازی (\w+) : جایگزینی کلی (خالی|پرت) با (میانگین|مد)', r'CLEAN \1 FILL_ALL \2 \3'),
             (r'پاکسازی (\w+) : جایگزینی (\w+) (خالی|پرت) با (میانگین|مد)', r'CLEAN \1 FILL_SPECIFIC \2 \3 \4'),
 
             (r'کپی (\w+) : در (\w+)', r'DUPLICATE \1 TO \2'),
             (r'ذخیره (\w+) : در "([^"]+)"', r'SAVE \1 TO "\2"'),
-            (r'محاسبه (\w+) : میانگین (\w+)', r'CALC \1 MEAN "OF" \2'),
-            (r'محاسبه (\w+) : انحراف_معیار (\w+)', r'CALC \1 STD "OF" \2'),
+            (r'محاسبه (\w+) : میانگین (\w+)', r'CALC \1 MEAN OF \2'),
+            (r'محاسبه (\w+) : انحراف_معیار (\w+)', r'CALC \1 STD OF \2'),
 
-            (r'نمودار (\w+) : (هیستوگرام|میانگین|خطی|پراکندگی|جعبه‌ای) (\w+)(?: در (\w+))?', r'PLOT \1 \2 OF \3 IN \4'),
+            (r'نمودار (\w+) : (هیستوگرام|میانگین|خطی|پراکندگی|جعبه‌ای) (\w+) در (\w+)', r'PLOT \1 \2 OF \3 IN \4'),
+            (r'نمودار (\w+) : (هیستوگرام|میانگین|خطی|پراکندگی|جعبه‌ای) (\w+)', r'PLOT \1 \2 OF \3 IN ALL'),
             (r'نمودار (\w+) : نقشه_حرارتی', r'PLOT \1 HEATMAP OF ALL IN ALL'),
 
             (r'فیلتر (\w+) : وقتی (\w+) (>=|<=|==|!=|>|<) ("[^"]+"|\d+(\.\d+)?)', r'FILTER \1 WHERE \2 \3 \4'),
@@ -60,10 +80,78 @@ class PersianToDSLMapper:
             (r'همبستگی (\w+) : بین (\w+) و (\w+)', r'CORRELATE \1 BETWEEN \2 AND \3'),
         ]
 
-    def translate(self, text):
+        # Rules grouped by their leading keyword (پاکسازی, فیلتر, نمودار, ...),
+        # precompiled once. Inside a group the first matching rule wins, so
+        # specific forms (حذف کلی) must come before general ones (حذف (\w+)).
+        # Replacements become format strings (\2 -> {1}) so a match is
+        # expanded without re-parsing the template on every line.
+        self.dispatch = {}
         for p, r in self.rules:
-            text = re.sub(p, r, text)
-        return text.strip()
+            keyword = p.split(" ", 1)[0]
+            template = re.sub(r'\\(\d)', lambda g: "{%d}" % (int(g.group(1)) - 1), r)
+            self.dispatch.setdefault(keyword, []).append((re.compile(p), template))
+
+    def translate_line(self, line):
+        line = line.strip()
+        keyword = line.partition(" ")[0]
+        for pattern, template in self.dispatch.get(keyword, ()):
+            m = pattern.match(line)
+            if m:
+                return template.format(*m.groups("")) + line[m.end():]
+        # English DSL (or unknown) lines pass through unchanged
+        return line
+
+    def translate_lines(self, text):
+        """
+        Translates the script line by line.
+
+        Returns:
+            list of (line_no, source_line, dsl_line) for every non-empty line,
+            line_no being 1-based in the original script.
+        """
+        result = []
+        for line_no, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if line:
+                result.append((line_no, line, self.translate_line(line)))
+        return result
+
+    def translate(self, text):
+        return "\n".join(dsl for _, _, dsl in self.translate_lines(text))
+
+
+_mapper = None
+
+
+def get_mapper():
+    """
+    Returns the process-wide mapper (it holds no per-script state).
+    """
+    global _mapper
+    if _mapper is None:
+        _mapper = PersianToDSLMapper()
+    return _mapper
+
+
+INPUT_PATHS = re.compile(r'(\bLOAD\s+|\bUSE_FIT\s+)"([^"]+)"')
+
+
+def resolve_input_paths(dsl_lines, base_dir):
+    """
+    Makes the relative input paths of translated lines (LOAD files, and
+    USE_FIT files that exist under base_dir) absolute against base_dir,
+    without changing the process's working directory. SAVE paths stay
+    relative to the run directory.
+    """
+    def resolve(m):
+        path = m.group(2)
+        full = os.path.join(base_dir, path)
+        if os.path.isabs(path) or (m.group(1).startswith("USE_FIT") and not os.path.exists(full)):
+            return m.group(0)
+        # Forward slashes keep Windows paths valid inside generated string literals
+        return f'{m.group(1)}"{full.replace(os.sep, "/")}"'
+
+    return [(line_no, source, INPUT_PATHS.sub(resolve, dsl)) for line_no, source, dsl in dsl_lines]
 
 
 # =====================================================
@@ -96,7 +184,8 @@ statement: load_stmt
          | normalize_stmt
          | corr_stmt
 
-load_stmt: "LOAD" STRING "INTO" ID
+load_stmt: "LOAD" STRING "INTO" ID OPTIMIZE?
+OPTIMIZE: "OPTIMIZE"
 
 
 clean_stmt: "CLEAN" ID clean_op
@@ -107,14 +196,16 @@ clean_op: drop_all
         | fill_specific
         | drop_duplicates
 
-drop_all: "DROP_ALL" TARGET
+drop_all: "DROP_ALL" TARGET OUTLIER_MODE?
 drop_specific: "DROP_SPECIFIC" ID TARGET
-fill_all: "FILL_ALL" TARGET METHOD
+fill_all: "FILL_ALL" TARGET METHOD (FIT_ACTION STRING)?
 fill_specific: "FILL_SPECIFIC" ID TARGET METHOD
 drop_duplicates: "DROP_DUPLICATES"
 
 TARGET: "خالی" | "پرت" | "null" | "outlier"
 METHOD: "میانگین" | "مد" | "mean" | "mode"
+FIT_ACTION: "SAVE_FIT" | "USE_FIT"
+OUTLIER_MODE: "همزمان" | "ترتیبی" | "simultaneous" | "sequential"
 
 DROP_ALL: "DROP_ALL"
 DROP_SPECIFIC: "DROP_SPECIFIC"
@@ -183,18 +274,113 @@ INT: /[0-9]+/
 """
 
 
+# Parser tables depend only on the grammar text, so the LALR parser is built
+# once per process and its serialized tables are kept on disk between runs.
+# Lark unpickles them, so they live in the user's own cache directory.
+PARSER_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "persian_dsl_compiler")
+
+_parser = None
+_parser_lock = threading.Lock()
+
+
+def parser_cache_path():
+    """
+    Path of the on-disk parser cache for the current grammar text.
+    """
+    digest = hashlib.sha256(grammar.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(PARSER_CACHE_DIR, f"grammar_{digest}.lark")
+
+
+def _private_dir(path):
+    """
+    True when path is a directory only the current user can write to
+    (always True where there are no POSIX owners).
+    """
+    if not hasattr(os, "getuid"):
+        return True
+    st = os.stat(path)
+    return st.st_uid == os.getuid() and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def build_parser(use_cache=True):
+    """
+    Builds a new LALR parser (loads the tables from disk when use_cache is set
+    and the cache directory belongs to the current user).
+    """
+    if use_cache:
+        try:
+            os.makedirs(PARSER_CACHE_DIR, mode=0o700, exist_ok=True)
+            use_cache = _private_dir(PARSER_CACHE_DIR)
+        except OSError:
+            use_cache = False
+    if not use_cache:
+        return Lark(grammar, parser="lalr")
+    return Lark(grammar, parser="lalr", cache=parser_cache_path())
+
+
+def get_parser():
+    """
+    Returns the process-wide parser singleton, building it on first use.
+    """
+    global _parser
+    if _parser is None:
+        with _parser_lock:
+            if _parser is None:
+                _parser = build_parser()
+    return _parser
+
+
 # =====================================================
-# 3. AST → Graphviz (.dot)
+# 3. AST Visualization (Graphviz PNG or built-in SVG)
 # =====================================================
 
-def ast_to_dot(tree, output_name="ast", output_dir="outputs"):
+# Larger trees are drawn as one node per run of same-kind statements
+AST_SUMMARY_NODES = 1000
+# ...and as one node per statement kind when that still gives more nodes
+AST_SUMMARY_MAX_CHILDREN = 60
+AST_CACHE_MAX_FILES = 64
+SVG_NODE_WIDTH = 150
+SVG_LEVEL_HEIGHT = 70
+
+
+def _node_label(node):
+    return node.data if hasattr(node, "data") else str(node)
+
+
+def count_nodes(tree):
+    return 1 + sum(count_nodes(child) for child in getattr(tree, "children", []))
+
+
+def ast_summary(tree):
     """
-    Generates AST image (PNG) using Graphviz and saves it in outputs directory.
+    Collapsed view of a large script: consecutive statements of the same
+    kind become one node, e.g. "filter_stmt x120 (statements 4-123)", or,
+    if there are too many such runs, every kind becomes one node.
     """
+    runs = []
+    for i, stmt in enumerate(tree.children, 1):
+        kind = _node_label(stmt.children[0]) if getattr(stmt, "children", None) else _node_label(stmt)
+        if runs and runs[-1][0] == kind:
+            runs[-1][2] = i
+        else:
+            runs.append([kind, i, i])
+    if len(runs) > AST_SUMMARY_MAX_CHILDREN:
+        counts = OrderedDict()
+        for kind, first, last in runs:
+            counts[kind] = counts.get(kind, 0) + last - first + 1
+        children = [Tree(f"{kind} x{n}", []) for kind, n in counts.items()]
+    else:
+        children = [
+            Tree(f"{kind} x{last - first + 1} (statements {first}-{last})" if last > first
+                 else f"{kind} (statement {first})", [])
+            for kind, first, last in runs
+        ]
+    return Tree(f"start ({len(tree.children)} statements, {count_nodes(tree)} nodes)", children)
 
-    os.makedirs(output_dir, exist_ok=True)
-    dot_path = os.path.join(output_dir, f"{output_name}.dot")
-    img_path = os.path.join(output_dir, f"{output_name}.png")
+
+def ast_dot_source(tree):
     node_id = 0
     lines = [
         "digraph AST {",
@@ -204,35 +390,267 @@ def ast_to_dot(tree, output_name="ast", output_dir="outputs"):
     def visit(node, parent=None):
         nonlocal node_id
         my_id = node_id
-        label = node.data if hasattr(node, "data") else str(node)
         # Escape quotes for Graphviz
-        label = label.replace('"', '\\"')
+        label = _node_label(node).replace('"', '\\"')
         lines.append(f'node{my_id} [label="{label}"];')
         if parent is not None:
             lines.append(f'node{parent} -> node{my_id};')
         node_id += 1
-        if hasattr(node, "children"):
-            for child in node.children:
-                visit(child, my_id)
+        for child in getattr(node, "children", []):
+            visit(child, my_id)
     visit(tree)
     lines.append("}")
+    return "\n".join(lines)
+
+
+def ast_svg_source(tree):
+    """
+    Pure-Python layered tree layout: leaves are placed left to right and
+    every parent is centered above its children.
+    """
+    from xml.sax.saxutils import escape
+
+    boxes, edges = [], []
+    next_leaf = 0
+
+    def place(node, depth):
+        nonlocal next_leaf
+        children = getattr(node, "children", [])
+        xs = [place(child, depth + 1) for child in children]
+        if xs:
+            x = (xs[0] + xs[-1]) / 2
+        else:
+            x = next_leaf
+            next_leaf += 1
+        boxes.append((x, depth, _node_label(node)))
+        edges.extend((x, depth, child_x) for child_x in xs)
+        return x
+
+    place(tree, 0)
+    depth = max(d for _, d, _ in boxes)
+    width = next_leaf * SVG_NODE_WIDTH + 20
+    height = (depth + 1) * SVG_LEVEL_HEIGHT + 20
+
+    def center(x):
+        return 10 + x * SVG_NODE_WIDTH + SVG_NODE_WIDTH / 2
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height}" '
+        'font-family="Helvetica" font-size="11">',
+        '<rect width="100%" height="100%" fill="white"/>',
+    ]
+    for x, d, child_x in edges:
+        parts.append(f'<line x1="{center(x):.1f}" y1="{10 + d * SVG_LEVEL_HEIGHT + 30}" '
+                     f'x2="{center(child_x):.1f}" y2="{10 + (d + 1) * SVG_LEVEL_HEIGHT}" stroke="black"/>')
+    for x, d, label in boxes:
+        box_w = SVG_NODE_WIDTH - 10
+        left = center(x) - box_w / 2
+        top = 10 + d * SVG_LEVEL_HEIGHT
+        parts.append(f'<rect x="{left:.1f}" y="{top}" width="{box_w}" height="30" fill="white" stroke="black"/>')
+        text = label if len(label) <= 24 else label[:23] + "…"
+        parts.append(f'<text x="{center(x):.1f}" y="{top + 19}" text-anchor="middle">'
+                     f'<title>{escape(label)}</title>{escape(text)}</text>')
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+def _evict_ast_cache(cache_dir):
+    files = sorted(os.listdir(cache_dir), key=lambda name: os.stat(os.path.join(cache_dir, name)).st_mtime)
+    for name in files[:-AST_CACHE_MAX_FILES]:
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except OSError:
+            pass
+
+
+def ast_to_dot(tree, output_name="ast", output_dir="outputs", fmt="png", summary=None):
+    """
+    Generates the AST image and saves it in output_dir.
+
+    fmt="png" renders with Graphviz `dot` and falls back to the built-in SVG
+    layout when Graphviz is missing or fails; fmt="svg" always uses the
+    built-in layout. summary=None collapses trees above AST_SUMMARY_NODES.
+    Images are cached by format and AST hash in output_dir/ast_cache;
+    output_name.dot is written either way.
+
+    Returns:
+        str: path of the written image
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if summary is None:
+        summary = count_nodes(tree) > AST_SUMMARY_NODES
+    view = ast_summary(tree) if summary else tree
+
+    dot_source = ast_dot_source(view)
+    cache_dir = os.path.join(output_dir, "ast_cache")
+    os.makedirs(cache_dir, exist_ok=True)
 
     # Write DOT file
+    dot_path = os.path.join(output_dir, f"{output_name}.dot")
     with open(dot_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
+        f.write(dot_source)
+
+    def cached(ext):
+        # Cache entries are per format, so an SVG fallback never answers a PNG request
+        key = hashlib.sha256(f"{ext}\0{dot_source}".encode("utf-8")).hexdigest()[:24]
+        return os.path.join(cache_dir, f"{key}.{ext}")
+
+    def publish(ext, path=None):
+        img_path = os.path.join(output_dir, f"{output_name}.{ext}")
+        if path is not None:
+            shutil.copyfile(path, img_path)
+            os.utime(path)
+        else:
+            shutil.copyfile(img_path, cached(ext))
+            _evict_ast_cache(cache_dir)
+        # Don't leave the other format's image of an older AST next to it
+        other = os.path.join(output_dir, f"{output_name}.{'svg' if ext == 'png' else 'png'}")
+        if os.path.exists(other):
+            os.remove(other)
+        return img_path
+
+    if fmt == "png":
+        if os.path.exists(cached("png")):
+            return publish("png", cached("png"))
+        if shutil.which("dot"):
+            # Convert DOT to PNG
+            png_path = os.path.join(output_dir, f"{output_name}.png")
+            try:
+                subprocess.run(["dot", "-Tpng", dot_path, "-o", png_path], check=True, capture_output=True)
+                return publish("png")
+            except (OSError, subprocess.CalledProcessError):
+                pass
+
+    if os.path.exists(cached("svg")):
+        return publish("svg", cached("svg"))
+    with open(os.path.join(output_dir, f"{output_name}.svg"), "w", encoding="utf-8") as f:
+        f.write(ast_svg_source(view))
+    return publish("svg")
+
+
+class ASTRender(threading.Thread):
+    """
+    Runs ast_to_dot in the background so it overlaps script execution.
+    After join(), path holds the image path and error any failure.
+    """
+    def __init__(self, tree, output_dir, fmt="png", tracer=None):
+        super().__init__(daemon=True)
+        self.tree, self.output_dir, self.fmt = tree, output_dir, fmt
+        self.tracer = tracer
+        self.path = None
+        self.error = None
+
+    def run(self):
+        try:
+            with self.tracer.span("ast_to_dot", "background") if self.tracer else nullcontext():
+                self.path = ast_to_dot(self.tree, output_name="ast", output_dir=self.output_dir, fmt=self.fmt)
+        except Exception as e:
+            self.error = e
+
 
-    # Convert DOT to PNG
-    subprocess.run(
-        ["dot", "-Tpng", dot_path, "-o", img_path],
-        check=True
-    )
+# =====================================================
+# 4. Input File Metadata (compile-time LOAD report)
+# =====================================================
+
+# path -> (size, mtime_ns, metadata)
+_metadata_cache = {}
+_metadata_lock = threading.Lock()
+
+
+def _count_csv_rows(path):
+    """
+    Counts data rows by counting newlines over a memory-mapped file,
+    without parsing any values.
+    """
+    with open(path, "rb") as f:
+        first_line = f.readline()
+        if os.fstat(f.fileno()).st_size == 0:
+            return [], 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            newlines = 0
+            chunk = 1 << 24
+            for start in range(0, len(mm), chunk):
+                newlines += mm[start:start + chunk].count(b"\n")
+            ends_with_newline = mm[-1:] == b"\n"
+
+    header = next(csv.reader([first_line.decode("utf-8-sig", errors="replace")]), [])
+    lines = newlines if ends_with_newline else newlines + 1
+    return header, max(lines - 1, 0)
+
+
+def _excel_dimensions(path):
+    """
+    Reads the first sheet's dimensions without loading cell values.
+    """
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True)
+    try:
+        ws = wb.worksheets[0]
+        header = [c for c in next(ws.iter_rows(max_row=1, values_only=True), ())]
+        return header, max((ws.max_row or 1) - 1, 0)
+    finally:
+        wb.close()
+
+
+def _columnar_metadata(path):
+    """
+    Reads row/column counts from the Parquet footer or the Arrow IPC
+    batch headers (memory-mapped, no data pages are decoded).
+    """
+    import pyarrow as pa
+    if path.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+        meta = pq.read_metadata(path)
+        return list(meta.schema.names), meta.num_rows
+    with pa.memory_map(path, "r") as source:
+        reader = pa.ipc.open_file(source)
+        rows = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+        return list(reader.schema.names), rows
+
+
+def sniff_file_metadata(path):
+    """
+    Returns {"columns": [...], "rows": int} for a CSV/Excel/Parquet/Arrow
+    file, or None.
+    Results are cached by file size and mtime.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    with _metadata_lock:
+        cached = _metadata_cache.get(path)
+    if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+        return cached[2]
+
+    lower = path.lower()
+    try:
+        if lower.endswith(".csv"):
+            columns, rows = _count_csv_rows(path)
+        elif lower.endswith((".xls", ".xlsx")):
+            columns, rows = _excel_dimensions(path)
+        elif lower.endswith((".parquet", ".feather", ".arrow")):
+            columns, rows = _columnar_metadata(path)
+        else:
+            return None
+    except Exception:
+        return None
+
+    meta = {"columns": columns, "rows": rows}
+    with _metadata_lock:
+        _metadata_cache[path] = (st.st_size, st.st_mtime_ns, meta)
+    return meta
 
 
 # =====================================================
-# 4. Code Generator (Transformer)
+# 5. Code Generator (Transformer)
 # =====================================================
 
 class CodeGenerator(Transformer):
+    # Engine the generated code runs on (see compiler_polars)
+    backend = "pandas"
+
     def __init__(self, output_dir):
         self.output_dir = output_dir
         self.plots_dir = os.path.join(output_dir, "plots")
@@ -243,6 +661,18 @@ class CodeGenerator(Transformer):
         self.report_lines = []
         self.log_counter = 1
 
+        # Report entries of the statements generated so far, as
+        # (title, body) pairs; title is None for raw report lines.
+        self.log_entries = []
+
+        # Script position of the statement being generated (set by
+        # compile_incremental); its first report block gets a runtime line
+        self.statement_index = None
+        self.profiled = set()
+        # Identical statements earlier in the script (keeps the report
+        # variables of repeated CLEANs apart)
+        self.occurrence = 0
+
     def statement(self, items):
         return items[0]
 
@@ -250,47 +680,80 @@ class CodeGenerator(Transformer):
         return "\n".join(items)
     
     def add_log(self, title, body=""):
+        self.log_entries.append((title, body))
         ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        block = f"[{self.log_counter}] {title}\n{body}\n\nTimestamp: {ts}\n"
+        runtime = ""
+        if self.statement_index is not None and self.statement_index not in self.profiled:
+            # Filled in from the runtime profile when the report is written
+            runtime = f"Runtime: {{PROFILE[{self.statement_index}]}}\n"
+            self.profiled.add(self.statement_index)
+        block = f"[{self.log_counter}] {title}\n{body}\n{runtime}\nTimestamp: {ts}\n"
         self.report_lines.append(block)
         self.log_counter += 1
 
+    def add_report_line(self, line):
+        self.log_entries.append((None, line))
+        self.report_lines.append(line)
+
+    def replay_log(self, entries):
+        """
+        Re-adds report entries recorded for a cached statement
+        (renumbered and timestamped for the current compile).
+        """
+        for title, body in entries:
+            if title is None:
+                self.add_report_line(body)
+            else:
+                self.add_log(title, body)
+
 
     # ---------- LOAD ----------
     def load_stmt(self, items):
-        file_path, var = items
+        file_path, var = items[:2]
+        optimize = len(items) > 2
         self.current_var = var
 
-        # try to get counts at compile time if file exists
+        # get counts at compile time from file metadata (no full read)
         file_name = str(file_path).strip('"')
         body = f"Loaded file: {file_name}\n"
-        try:
-            if os.path.exists(file_name):
-                if file_name.lower().endswith(".csv"):
-                    df_tmp = pd.read_csv(file_name)
-                elif file_name.lower().endswith((".xls", ".xlsx")):
-                    df_tmp = pd.read_excel(file_name)
-                else:
-                    df_tmp = None
-                if df_tmp is not None:
-                    body += f"Rows: {len(df_tmp)}\nCols: {df_tmp.shape[1]}\n"
-        except Exception:
-            pass
+        meta = sniff_file_metadata(file_name)
+        if meta is not None:
+            body += f"Rows: {meta['rows']}\nCols: {len(meta['columns'])}\n"
+        if optimize:
+            body += "Dtypes: optimized (categoricals, float32 floats, compact strings)\n"
 
         self.add_log("LOAD", body.strip())
 
+        optimize_code = ""
+        if optimize:
+            self.add_report_line(f"Memory by column ({var}):\n{{dtype_report_{var}}}")
+            optimize_code = f'''
+# --- Optimize dtypes ---
+{var}, dtype_report_{var} = rt.optimize_dtypes({var})
+print(dtype_report_{var})
+'''
+
+        # LOAD_COLUMNS is filled per compile by the column pruning pass
+        # (None = all columns), so this code stays valid in the statement cache
         return f'''
 # --- Load Data ---
 if not os.path.exists({file_path}):
     raise FileNotFoundError("File not found")
 
+use_columns = LOAD_COLUMNS.get(({file_path}, "{var}"))
 if {file_path}.endswith(".csv"):
-    {var} = pd.read_csv({file_path})
+    {var} = pd.read_csv({file_path}, usecols=use_columns)
 elif {file_path}.endswith(".xlsx"):
-    {var} = pd.read_excel({file_path})
+    {var} = pd.read_excel({file_path}, usecols=use_columns)
+elif {file_path}.endswith(".parquet"):
+    {var} = pd.read_parquet({file_path}, columns=use_columns)
+elif {file_path}.endswith((".feather", ".arrow")):
+    # Arrow IPC: memory-mapped, columns are not copied until pandas needs them
+    import pyarrow.feather as feather
+    {var} = feather.read_table({file_path}, columns=use_columns, memory_map=True).to_pandas(split_blocks=True)
 else:
-    raise ValueError("Only CSV or Excel files are supported")
-'''
+    raise ValueError("Supported formats: .csv, .xlsx, .parquet, .feather, .arrow")
+{optimize_code}'''
     
     # ---------- INFORMATION ----------
     def describe_stmt(self, items):
@@ -321,8 +784,12 @@ elif {filename}.endswith(".xlsx"):
     {var}.to_excel(save_path, index=False)
 elif {filename}.endswith(".json"):
     {var}.to_json(save_path, orient="records")
+elif {filename}.endswith(".parquet"):
+    {var}.to_parquet(save_path, index=False)
+elif {filename}.endswith((".feather", ".arrow")):
+    {var}.reset_index(drop=True).to_feather(save_path)
 else:
-    raise ValueError("Supported formats: .csv, .xlsx, .json")
+    raise ValueError("Supported formats: .csv, .xlsx, .json, .parquet, .feather, .arrow")
 '''
 
 
@@ -338,6 +805,14 @@ else:
 
         def get_method(m): return 'mean' if m in ['میانگین', 'mean'] else 'mode'
         def is_outlier(target): return target in ['پرت', 'outlier']
+        def get_mode(params): return 'simultaneous' if params[1:] and params[1] in ['همزمان', 'simultaneous'] else 'sequential'
+
+        # Outlier engine results get a per-statement name so that several
+        # CLEAN statements on one frame keep their own report values
+        tag = hashlib.sha1(f"{var} {op_type} {' '.join(params)} {self.occurrence}".encode("utf-8")).hexdigest()[:8]
+        outlier_report = f"outlier_report_{tag}"
+        if any(is_outlier(p) for p in params):
+            self.add_report_line(f"Outliers flagged per column ({var}, {op_type}):\n{{{outlier_report}}}")
 
         code = f"\n# --- Cleaning: {op_type} ---\n"
 
@@ -346,46 +821,56 @@ else:
 
         elif op_type == "DROP_ALL":
             target = params[0]
+            if params[1:] and not is_outlier(target):
+                raise ValueError(f"CLEAN {var} DROP_ALL {target}: {params[1]} only applies to outliers")
             if is_outlier(target):
-                code += f"""for col in {var}.select_dtypes(include=['number']).columns:
-    q1, q3 = {var}[col].quantile([0.25, 0.75])
-    iqr = q3 - q1
-    {var} = {var}[({var}[col] >= q1-1.5*iqr) & ({var}[col] <= q3+1.5*iqr)]"""
+                code += f"""{var}, {outlier_report} = rt.drop_outliers({var}, mode="{get_mode(params)}")
+print({outlier_report})"""
             else:
                 code += f"{var} = {var}.dropna()"
 
         elif op_type == "DROP_SPECIFIC":
             col, target = params
             if is_outlier(target):
-                code += f"""q1, q3 = {var}['{col}'].quantile([0.25, 0.75])
-iqr = q3 - q1
-{var} = {var}[({var}['{col}'] >= q1-1.5*iqr) & ({var}['{col}'] <= q3+1.5*iqr)]"""
+                code += f"""{var}, {outlier_report} = rt.drop_outliers({var}, columns=['{col}'])
+print({outlier_report})"""
             else:
                 code += f"{var} = {var}.dropna(subset=['{col}'])"
 
         elif op_type == "FILL_ALL":
-            target, method = params
+            target, method = params[:2]
             m = get_method(method)
-            val_logic = f"{var}[col].mode()[0]" if m == 'mode' else f"{var}[col].mean()"
+            if is_outlier(target) and len(params) > 2:
+                raise ValueError(f"CLEAN {var} FILL_ALL {target}: {params[2]} only applies to missing values")
             
             if is_outlier(target):
-                code += f"""for col in {var}.select_dtypes(include=['number']).columns:
-    q1, q3 = {var}[col].quantile([0.25, 0.75]); iqr = q3 - q1
-    low, high = q1-1.5*iqr, q3+1.5*iqr
-    {var}.loc[({var}[col] < low) | ({var}[col] > high), col] = {val_logic}"""
+                code += f"""{var}, {outlier_report} = rt.fill_outliers({var}, "{m}")
+print({outlier_report})"""
             else:
-                code += f"""for col in {var}.columns:
-    {var}[col] = {var}[col].fillna({val_logic})"""
+                # One fillna(dict) with statistics computed once per frame;
+                # SAVE_FIT stores the fitted values, USE_FIT reuses them.
+                fill_report = f"fill_report_{tag}"
+                self.add_report_line(f"Missing values filled ({var}):\n{{{fill_report}}}")
+                if len(params) > 2:
+                    action, fit_file = params[2], params[3]
+                    if action == "SAVE_FIT":
+                        code += f"""fit_path = os.path.join(OUTPUT_DIR, {fit_file})
+{var}, {fill_report} = rt.impute_missing({var}, "{m}", fit_path=fit_path, save_fit=True)"""
+                    else:
+                        code += f"""fit_path = {fit_file} if os.path.exists({fit_file}) else os.path.join(OUTPUT_DIR, {fit_file})
+{var}, {fill_report} = rt.impute_missing({var}, "{m}", fit_path=fit_path)"""
+                else:
+                    code += f"""{var}, {fill_report} = rt.impute_missing({var}, "{m}")"""
+                code += f"\nprint({fill_report})"
 
         elif op_type == "FILL_SPECIFIC":
             col, target, method = params
             m = get_method(method)
-            val_calc = f"{var}['{col}'].mode()[0]" if m == 'mode' else f"{var}['{col}'].mean()"
+            val_calc = f'STATS.agg("{var}", {var}, {{"{col}": ["{m}"]}})[("{col}", "{m}")]'
             
             if is_outlier(target):
-                code += f"""q1, q3 = {var}['{col}'].quantile([0.25, 0.75]); iqr = q3 - q1
-low, high = q1-1.5*iqr, q3+1.5*iqr
-{var}.loc[({var}['{col}'] < low) | ({var}['{col}'] > high), '{col}'] = {val_calc}"""
+                code += f"""{var}, {outlier_report} = rt.fill_outliers({var}, "{m}", columns=['{col}'])
+print({outlier_report})"""
             else:
                 code += f"{var}['{col}'] = {var}['{col}'].fillna({val_calc})"
 
@@ -397,18 +882,23 @@ low, high = q1-1.5*iqr, q3+1.5*iqr
 
     def calc_stmt(self, items):
         var = items[0]
-        lines = []
+
+        # All requested statistics come from one cached agg call
+        wanted = {}
+        for op, col in items[1:]:
+            wanted.setdefault(col, []).append(op.lower())
+        lines = [f'calc_values = STATS.agg("{var}", {var}, {wanted!r})']
 
         for op, col in items[1:]:
             if op == "MEAN":
-                lines.append(f'mean_{col} = {var}["{col}"].mean()')
+                lines.append(f'mean_{col} = calc_values[("{col}", "mean")]')
 
-                self.report_lines.append(f"Mean of {col}: {{mean_{col}:.2f}}")
+                self.add_report_line(f"Mean of {col}: {{mean_{col}:.2f}}")
                 self.add_log("CALC", f"Mean of {col}")
 
             elif op == "STD":
-                lines.append(f'std_{col} = {var}["{col}"].std()')
-                self.report_lines.append(f"Standard deviation of {col}: {{std_{col}:.2f}}")
+                lines.append(f'std_{col} = calc_values[("{col}", "std")]')
+                self.add_report_line(f"Standard deviation of {col}: {{std_{col}:.2f}}")
                 self.add_log("CALC", f"STD of {col}")
 
         return "\n".join(lines)
@@ -427,55 +917,81 @@ low, high = q1-1.5*iqr, q3+1.5*iqr
         }
         
         selected_type = type_map.get(plot_type, "HIST")
-        plot_code = ""
+        data = ""
         path = ""
 
         self.add_log("PLOT", f"Type: {selected_type}\nTarget: {target_col}\nGroup: {group_col}")
 
+        # Only the data a plot draws is captured here; PLOTS renders the
+        # figures in worker processes once the script has run
         if selected_type == "HIST":
             path = os.path.join(self.plots_dir, f"hist_{target_col}.png")
-            plot_code = f'{var}["{target_col}"].hist(bins=20)\nplt.title("Histogram of {target_col}")'
-            
+            title = f"Histogram of {target_col}"
+            data = f'{var}["{target_col}"].copy()'
+
         elif selected_type == "MEAN":
             path = os.path.join(self.plots_dir, f"mean_{target_col}_by_{group_col}.png")
-            plot_code = f'{var}.groupby("{group_col}")["{target_col}"].mean().plot(kind="bar")\nplt.title("Mean {target_col} by {group_col}")'
+            title = f"Mean {target_col} by {group_col}"
+            data = f'STATS.grouped("{var}", {var}, "{group_col}", "{target_col}", "mean")'
 
         elif selected_type == "LINE":
             path = os.path.join(self.plots_dir, f"line_{target_col}_{group_col}.png")
-            plot_code = f'plt.plot({var}["{target_col}"], {var}["{group_col}"], color="red")\nplt.title("Trend: {target_col} vs {group_col}")'
+            title = f"Trend: {target_col} vs {group_col}"
+            data = f'{var}["{target_col}"].copy(), {var}["{group_col}"].copy()'
 
         elif selected_type == "BOX":
             path = os.path.join(self.plots_dir, f"box_{target_col}_by_{group_col}.png")
-            plot_code = f'{var}.boxplot(column="{target_col}", by="{group_col}")\nplt.title("Distribution of {target_col} by {group_col}")\nplt.suptitle("")'
+            title = f"Distribution of {target_col} by {group_col}"
+            data = f'{var}[["{target_col}", "{group_col}"]], "{target_col}", "{group_col}"'
 
         elif selected_type == "HEATMAP":
             path = os.path.join(self.plots_dir, f"heatmap_{var}.png")
-            plot_code = f'corr = {var}.select_dtypes(include=["number"]).corr()\nsns.heatmap(corr, annot=True, cmap="coolwarm")\nplt.title("Correlation Heatmap")'
+            title = "Correlation Heatmap"
+            data = f'{var}.select_dtypes(include=["number"]).corr()'
+
         elif selected_type == "SCAT":
             path = os.path.join(self.plots_dir, f"scat_{target_col}_in_{group_col}.png")
-            plot_code = f'plt.scatter({var}["{target_col}"], {var}["{group_col}"], edgecolors="black", s=50)\nplt.title("Scatter of {target_col} by {group_col}")'
+            title = f"Scatter of {target_col} by {group_col}"
+            data = f'{var}["{target_col}"].copy(), {var}["{group_col}"].copy()'
 
-        # === CHANGE 1: REMOVED plt.show() to prevent GUI freezing ===
         return f'''
 # --- Plotting {selected_type} ---
-plt.figure(figsize=(10, 6))
-{plot_code}
-plt.tight_layout()
-plt.savefig(r"{path}", dpi=150)  # === CHANGE 2: Added dpi for better quality ===
-plt.close()  # === CHANGE 3: Always close figure to free memory ===
+PLOTS.submit("{selected_type}", r"{path}", "{title}", {data})
 '''
 
     # ---------- FILTERS ----------
+    @staticmethod
+    def filter_mask(kind, items):
+        """
+        Boolean row mask of a filter statement (also used by the plan optimizer
+        to fuse adjacent filters).
+        """
+        var = items[0]
+        if kind == "filter_stmt":
+            _, col, op, val = items
+            return f'{var}["{col}"] {op} {val}'
+        if kind == "filter_range_stmt":
+            _, col, low, high = items
+            return f'({var}["{col}"] >= {low}) & ({var}["{col}"] <= {high})'
+        if kind == "filter_complex_stmt":
+            condition = str(items[1]).replace(" و ", " & ").replace(" یا ", " | ")
+            return f"{var}.eval('''{condition}''')"
+        if kind == "search_stmt":
+            _, col, val = items
+            val_clean = str(val).replace('"', '')
+            return f'{var}["{col}"].str.contains("{val_clean}", na=False, case=False)'
+        raise ValueError(f"Not a filter statement: {kind}")
+
     def filter_stmt(self, items):
         var, col, op, val = items
 
         self.add_log("FILTER", f"Condition: {col} {op} {val}")
-        return f'{var} = {var}[{var}["{col}"] {op} {val}]'
+        return f'{var} = {var}[{self.filter_mask("filter_stmt", items)}]'
     
     def filter_range_stmt(self, items):
         var, col, low, high = items
         self.add_log("FILTER_RANGE", f"{col} between {low} and {high}")
-        return f'{var} = {var}[({var}["{col}"] >= {low}) & ({var}["{col}"] <= {high})]'
+        return f'{var} = {var}[{self.filter_mask("filter_range_stmt", items)}]'
     
     def filter_complex_stmt(self, items):
         var, raw_condition = items
@@ -490,7 +1006,7 @@ plt.close()  # === CHANGE 3: Always close figure to free memory ===
 
         val_clean = str(val).replace('"', '')
         self.add_log("SEARCH", f"Search: {col} contains {val_clean}")
-        return f'{var} = {var}[{var}["{col}"].str.contains("{val_clean}", na=False, case=False)]'
+        return f'{var} = {var}[{self.filter_mask("search_stmt", items)}]'
     
     # ---------- LEVELING ----------
     def level_op(self, items):
@@ -548,7 +1064,7 @@ labels = {labels}
         return f'''
 # --- GroupBy: {op_eng} {target_col} by {group_col} ---
 print(f"\\nreport{op_eng} {target_col} according to {group_col}:")
-result = {var}.groupby("{group_col}")["{target_col}"].{op_eng}()
+result = STATS.grouped("{var}", {var}, "{group_col}", "{target_col}", "{op_eng}")
 print(result)
 '''
     
@@ -584,8 +1100,8 @@ print(result)
         self.add_log("NORMALIZE", f"Normalized column: {col} in {var}")
         return f'''
 # --- Min-Max Normalization ---
-col_min = {var}["{col}"].min()
-col_max = {var}["{col}"].max()
+col_stats = STATS.agg("{var}", {var}, {{"{col}": ["min", "max"]}})
+col_min, col_max = col_stats[("{col}", "min")], col_stats[("{col}", "max")]
 {var}["{col}"] = ({var}["{col}"] - col_min) / (col_max - col_min)
 '''
     
@@ -600,37 +1116,945 @@ print(f"\\nMeasure of correlation of {col1} and {col2}: {{corr_val:.4f}}")
 '''
 
 # =====================================================
-# 5. Compiler Pipeline (MODIFIED FOR GUI INTEGRATION)
+# 6. Incremental Compilation (per-statement cache)
 # =====================================================
 
-def run_compiler(persian_code, capture_output=True):
+class StatementCache:
     """
-    Runs the compiler pipeline.
+    Process-wide LRU cache of compiled statements.
+    Maps a statement fingerprint to (statement trees, python code, report entries).
+    """
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self.entries)}
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+statement_cache = StatementCache()
+
+
+def statement_fingerprint(dsl_line, output_dir, backend="pandas", occurrence=0):
+    """
+    Fingerprint of one translated statement.
+    Covers the statement text and how many identical lines precede it,
+    the backend, the output directory (plot paths) and the size/mtime of
+    any file it names, since LOAD reads it at compile time.
+    """
+    h = hashlib.sha256()
+    h.update(f"{backend}\0{occurrence}\0{output_dir}\0{dsl_line}".encode("utf-8"))
+    for path in re.findall(r'"([^"]+)"', dsl_line):
+        if os.path.isfile(path):
+            st = os.stat(path)
+            h.update(f"\0{path}:{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def parse_script(parser, dsl_lines):
+    """
+    Parses the whole translated script, reporting errors by source line.
+    """
+    dsl_code = "\n".join(dsl for _, _, dsl in dsl_lines)
+    try:
+        return parser.parse(dsl_code)
+    except UnexpectedInput as e:
+        # Report the error against the line the user actually wrote
+        if 1 <= e.line <= len(dsl_lines):
+            line_no, source_line, _ = dsl_lines[e.line - 1]
+            raise SyntaxError(f"Syntax error at line {line_no}: {source_line}\n{e}") from e
+        raise
+
+
+def compile_incremental(dsl_lines, parser, generator, cache=None, tracer=None):
+    """
+    Parses and generates code statement by statement, reusing cached
+    results for statements whose fingerprint has not changed
+    (with a detailed tracer, each parse and transform is a span).
+
+    Returns:
+        tuple: (ast_tree, units, {"hits": int, "misses": int})
+        where units is a list of (statement_trees, python_code) in script order.
+    """
+    if cache is None:
+        cache = statement_cache
+    if tracer is None:
+        tracer = Tracer()
+
+    # Pass 1: look up every line, parse the ones that changed
+    plan, seen = [], {}
+    for line_no, _, dsl in dsl_lines:
+        occurrence = seen.get(dsl, 0)
+        seen[dsl] = occurrence + 1
+        key = statement_fingerprint(dsl, generator.output_dir, generator.backend, occurrence)
+        entry = cache.get(key)
+        if entry is None:
+            try:
+                with tracer.statement(f"parse line {line_no}", "parse", dsl=dsl):
+                    tree = parser.parse(dsl)
+            except UnexpectedInput:
+                # Not a self-contained statement line (or a syntax error):
+                # compile the whole script in one go instead.
+                ast_tree = parse_script(parser, dsl_lines)
+                units, seen = [], {}
+                for stmt in ast_tree.children:
+                    generator.occurrence = seen.get(repr(stmt), 0)
+                    seen[repr(stmt)] = generator.occurrence + 1
+                    units.append(([stmt], generator.transform(Tree("start", [stmt]))))
+                generator.occurrence = 0
+                return ast_tree, units, {"hits": 0, "misses": len(dsl_lines)}
+            plan.append((key, tree, None, occurrence))
+        else:
+            plan.append((key, None, entry, occurrence))
+
+    # Pass 2: generate changed statements, replay cached ones (in order)
+    statements, units = [], []
+    hits = misses = 0
+    for key, tree, entry, occurrence in plan:
+        # Fresh list per statement: the recorded one is stored in the cache
+        generator.log_entries = []
+        generator.statement_index = len(statements)
+        generator.occurrence = occurrence
+        if entry is None:
+            with tracer.statement(f"transform {_statement_name(tree.children[0].children[0])}", "transform"):
+                code = generator.transform(tree)
+            entry = (tree.children, code, generator.log_entries)
+            cache.put(key, entry)
+            misses += 1
+        else:
+            generator.replay_log(entry[2])
+            hits += 1
+        # New wrapper objects: cached trees may occur more than once, and
+        # the runtime profile maps executed statements back by identity
+        trees = [Tree(stmt.data, stmt.children) for stmt in entry[0]]
+        statements.extend(trees)
+        units.append((trees, entry[1]))
+    generator.log_entries = []
+    generator.statement_index = None
+    generator.occurrence = 0
+
+    return Tree("start", statements), units, {"hits": hits, "misses": misses}
+
+
+# =====================================================
+# 7. Logical Plan Optimizer (filter pushdown + fusion)
+# =====================================================
+
+FILTER_STMTS = {"filter_stmt", "filter_range_stmt", "filter_complex_stmt", "search_stmt"}
+# Row-local statements that add or rewrite a column; a filter that does not
+# read that column can run before them without changing the result.
+# (NORMALIZE is not here: its min/max depend on which rows are present.)
+COLUMN_CREATING_STMTS = {"create_col_stmt", "convert_time_stmt", "level_stmt"}
+
+# CREATE_COL expressions with method calls (x.mean(), ...) are not row-local
+METHOD_CALL = re.compile(r'\.\s*[_a-zA-Z]')
+
+
+class PlanNode:
+    """
+    One step of the logical plan: a compiled unit plus what the optimizer
+    needs to know about it (kind, frame variable, columns read/written).
+    """
+    def __init__(self, trees, code):
+        self.trees = trees
+        self.code = code
+        self.masks = []
+        self.reads = set()
+        self.writes = set()
+
+        node = trees[0].children[0] if len(trees) == 1 else None
+        if node is None:
+            # several statements on one line: kept as an opaque block
+            self.kind, self.var = "block", None
+            return
+        self.kind = node.data
+        self.var = str(node.children[0]) if node.data != "load_stmt" else str(node.children[1])
+        items = [c for c in node.children if isinstance(c, Token)]
+
+        if self.kind in FILTER_STMTS:
+            self.masks = [CodeGenerator.filter_mask(self.kind, items)]
+            if self.kind == "filter_complex_stmt":
+                self.reads = set(IDENTIFIER.findall(str(items[1])))
+            else:
+                self.reads = {str(items[1])}
+        elif self.kind == "create_col_stmt":
+            self.writes = {str(items[1])}
+            self.row_local = not METHOD_CALL.search(str(items[2]))
+        elif self.kind == "convert_time_stmt":
+            self.writes = {str(items[1])}
+        elif self.kind == "level_stmt":
+            self.writes = {f"{items[1]}_level"}
+
+    @property
+    def is_filter(self):
+        return self.kind in FILTER_STMTS
+
+    def creates_columns_row_locally(self):
+        if self.kind == "create_col_stmt":
+            return self.row_local
+        return self.kind in COLUMN_CREATING_STMTS
+
+    def label(self):
+        name = _statement_name(self.trees[0].children[0]) if self.kind != "block" else "BLOCK"
+        if self.is_filter:
+            detail = " & ".join(f"({m})" for m in self.masks) if len(self.masks) > 1 else self.masks[0]
+            if len(self.masks) > 1:
+                name = f"FILTER x{len(self.masks)}"
+        else:
+            detail = " ".join(str(t) for tree in self.trees for t in tree.scan_values(lambda v: isinstance(v, Token)))
+        return f"{name:<16}{detail}"
+
+
+class LogicalPlan:
+    """
+    Statement-level plan between the AST and the executed code.
+
+    optimize() moves filters ahead of row-local column-creating statements
+    on the same frame (when the filter does not read the created column)
+    and fuses adjacent filters on one frame into a single boolean mask.
+    """
+    def __init__(self, units):
+        self.nodes = [PlanNode(trees, code) for trees, code in units]
+        self.pushed = 0
+        self.fused = 0
+
+    def explain(self):
+        return "\n".join(f"{i:>3}  {node.label()}" for i, node in enumerate(self.nodes, 1))
+
+    def optimize(self):
+        self._push_down_filters()
+        self._fuse_filters()
+        return self
+
+    def _push_down_filters(self):
+        nodes = self.nodes
+        for i in range(1, len(nodes)):
+            j = i
+            while j > 0 and nodes[j].is_filter:
+                prev = nodes[j - 1]
+                if prev.var != nodes[j].var or not prev.creates_columns_row_locally():
+                    break
+                if nodes[j].reads & prev.writes:
+                    break
+                nodes[j - 1], nodes[j] = nodes[j], prev
+                self.pushed += 1
+                j -= 1
+
+    def _fuse_filters(self):
+        fused = []
+        for node in self.nodes:
+            last = fused[-1] if fused else None
+            if last is not None and last.is_filter and node.is_filter and last.var == node.var:
+                last.trees = last.trees + node.trees
+                last.masks = last.masks + node.masks
+                last.reads = last.reads | node.reads
+                last.code = (
+                    f"\n# --- Fused filters ({len(last.masks)}) ---\n"
+                    f"{node.var} = {node.var}[" + " & ".join(f"({m})" for m in last.masks) + "]"
+                )
+                self.fused += 1
+            else:
+                fused.append(node)
+        self.nodes = fused
+
+    def units(self):
+        return [(node.trees, node.code) for node in self.nodes]
+
+
+# =====================================================
+# 8. Statistics Cache Invalidation
+# =====================================================
+
+# Statements that only read their frame; every other statement changes it
+READ_ONLY_STMTS = {
+    "describe_stmt", "head_stmt", "calc_stmt", "plot_stmt",
+    "groupby_stmt", "corr_stmt", "save_stmt",
+}
+
+
+def statement_frame(node):
+    """
+    The frame variable a statement works on (the target for LOAD/DUPLICATE).
+    """
+    index = 1 if node.data in ("load_stmt", "duplicate_stmt") else 0
+    return str(node.children[index])
+
+
+def unit_frames(trees, mutated_only=False):
+    """
+    Frame variables used (or with mutated_only, changed) by the statements.
+    """
+    frames = []
+    for stmt in trees:
+        node = stmt.children[0]
+        if mutated_only and node.data in READ_ONLY_STMTS:
+            continue
+        var = statement_frame(node)
+        if var not in frames:
+            frames.append(var)
+    return frames
+
+
+def mutated_frames(trees):
+    """
+    Frame variables changed by the given statements.
+    """
+    return unit_frames(trees, mutated_only=True)
+
+
+def with_stats_invalidation(units):
+    """
+    Appends STATS.invalidate(...) to every unit that changes a frame, so the
+    runtime statistics cache never serves values of an older version.
+    """
+    result = []
+    for trees, code in units:
+        frames = mutated_frames(trees)
+        if frames:
+            code += "\n" + "\n".join(f'STATS.invalidate("{var}")' for var in frames)
+        result.append((trees, code))
+    return result
+
+
+# =====================================================
+# 9. Column Pruning (read only the columns a script uses)
+# =====================================================
+
+# Statements that look at every column of their frame
+ALL_COLUMN_STMTS = {"describe_stmt", "head_stmt", "save_stmt"}
+ALL_COLUMN_CLEAN_OPS = {"drop_duplicates", "drop_all", "fill_all"}
+
+IDENTIFIER = re.compile(r'[_a-zA-Z\u0600-\u06FF][a-zA-Z0-9_\u0600-\u06FF\u06F0-\u06F9]*')
+
+
+def analyze_column_usage(ast_tree):
+    """
+    Collects, for every LOAD, the names its frame is referenced with later on
+    (including identifiers inside CREATE_COL and FILTER_COMPLEX expressions).
+
+    Returns:
+        dict: {(path, var): set of names, or None if all columns are needed}
+    """
+    current = {}   # var -> key of the LOAD that produced it
+    usage = {}
+
+    def need(var, names):
+        key = current.get(var)
+        if key is not None and usage[key] is not None:
+            usage[key].update(names)
+
+    def need_all(var):
+        key = current.get(var)
+        if key is not None:
+            usage[key] = None
+
+    for stmt in ast_tree.children:
+        node = stmt.children[0]
+        kind = node.data
+        var = str(node.children[0])
+
+        if kind == "load_stmt":
+            path, var = str(node.children[0]).strip('"'), str(node.children[1])
+            current[var] = (path, var)
+            usage.setdefault((path, var), set())
+        elif kind in ALL_COLUMN_STMTS:
+            need_all(var)
+        elif kind == "duplicate_stmt":
+            # The copy is not tracked separately, so keep every column
+            need_all(var)
+            current.pop(str(node.children[1]), None)
+        elif kind == "merge_stmt":
+            need_all(var)
+            need_all(str(node.children[1]))
+        elif kind == "clean_stmt" and node.children[1].children[0].data in ALL_COLUMN_CLEAN_OPS:
+            need_all(var)
+        elif kind == "plot_stmt" and str(node.children[1]) == "HEATMAP":
+            need_all(var)
+        elif kind in ("create_col_stmt", "filter_complex_stmt"):
+            expr = str(node.children[-1])
+            need(var, IDENTIFIER.findall(expr))
+        else:
+            names = node.scan_values(lambda t: isinstance(t, Token) and t.type == "ID")
+            need(var, [str(n) for n in names][1:])
+
+    return usage
+
+
+def prune_load_columns(ast_tree):
+    """
+    Decides which columns each LOAD reads, using the file header to drop
+    names the script creates itself. LOADs whose header is unknown, or that
+    need every column, are left out (read everything).
+
+    Returns:
+        dict: {(path, var): [columns in file order]}
+    """
+    load_columns = {}
+    for (path, var), names in analyze_column_usage(ast_tree).items():
+        if names is None:
+            continue
+        meta = sniff_file_metadata(path)
+        if not meta or not meta["columns"]:
+            continue
+        header = meta["columns"]
+        columns = [c for c in header if c in names]
+        if columns and len(columns) < len(header):
+            load_columns[(path, var)] = columns
+    return load_columns
+
+
+# =====================================================
+# 10. Execution Checkpoints
+# =====================================================
+
+class CheckpointStore:
+    """
+    On-disk snapshots of the execution variables, one pickle per statement
+    prefix. Least recently used snapshots are evicted once the directory
+    grows beyond max_bytes.
+    """
+    def __init__(self, directory, max_bytes=2 * 1024 ** 3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def has(self, key):
+        return os.path.exists(self.path(key))
+
+    def load(self, key):
+        path = self.path(key)
+        with open(path, "rb") as f:
+            variables = pickle.load(f)
+        # Mark as recently used
+        os.utime(path)
+        return variables
+
+    def save(self, key, variables):
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(variables, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                st = os.stat(os.path.join(self.directory, name))
+                files.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+
+
+def input_fingerprint(statement_trees, load_columns=None):
+    """
+    Size/mtime fingerprint of the files read by LOAD statements
+    (and of the columns they read, see prune_load_columns).
+    """
+    load_columns = load_columns or {}
+    parts = []
+    for stmt in statement_trees:
+        for node in stmt.find_data("load_stmt"):
+            path = str(node.children[0]).strip('"')
+            if os.path.isfile(path):
+                st = os.stat(path)
+                parts.append(f"{path}:{st.st_size}:{st.st_mtime_ns}")
+            else:
+                parts.append(f"{path}:missing")
+            parts.append(repr(load_columns.get((path, str(node.children[1])))))
+    return "|".join(parts)
+
+
+def checkpoint_keys(units, load_columns=None):
+    """
+    One key per statement: a hash chained over the code of every statement
+    up to and including it, plus the fingerprints of the files they load.
+    """
+    keys = []
+    h = hashlib.sha256()
+    for statement_trees, code in units:
+        h.update(code.encode("utf-8") + b"\0")
+        h.update(input_fingerprint(statement_trees, load_columns).encode("utf-8") + b"\0")
+        keys.append(h.copy().hexdigest())
+    return keys
+
+
+def snapshot_variables(env, base_names):
+    """
+    Picklable script variables (DataFrames, results, scalars) defined in env.
+    """
+    return {
+        name: value for name, value in env.items()
+        if name not in base_names and not name.startswith("__")
+        and not isinstance(value, (types.ModuleType, types.FunctionType, type))
+    }
+
+
+# Report variables the cleaning/OPTIMIZE code prints (restored with the
+# snapshot, so a resumed run prints them without re-running the statement)
+PRINTED_REPORT = re.compile(r"^print\(((?:dtype|outlier|fill)_report_\w+)\)$", re.MULTILINE)
+
+
+def writes_files(stmt):
+    """
+    True when a statement node writes a file: SAVE, PLOT (through the plot
+    queue) and FILL_ALL ... SAVE_FIT.
+    """
+    if stmt.data in ("save_stmt", "plot_stmt"):
+        return True
+    if stmt.data == "clean_stmt":
+        op = stmt.children[1].children[0]
+        return op.data == "fill_all" and any(str(c) == "SAVE_FIT" for c in op.children)
+    return False
+
+
+def execute_with_checkpoints(units, env, store, run_unit=None):
+    """
+    Restores the longest statement prefix that has a snapshot, then executes
+    only the remaining statements (through run_unit(i) when given),
+    snapshotting after each one.
+
+    Restored statements that write files (see writes_files) are re-run
+    on the snapshot taken before them, so a resumed run writes the same
+    files as a full one; a prefix is only restored when all of those
+    snapshots are still there. The reports other restored statements
+    printed are printed again from the snapshot.
+
+    Returns:
+        tuple: (statements restored from the checkpoint, of which re-run)
+    """
+    keys = checkpoint_keys(units, env.get("LOAD_COLUMNS"))
+    base_names = set(env)
+    base = dict(env)
+    writers = [j for j, (trees, _) in enumerate(units)
+               if any(writes_files(stmt.children[0]) for stmt in trees)]
+
+    start, replayed = 0, 0
+    for i in range(len(keys) - 1, -1, -1):
+        replays = [j for j in writers if j <= i]
+        if not store.has(keys[i]) or not all(j == 0 or store.has(keys[j - 1]) for j in replays):
+            continue
+        try:
+            variables = store.load(keys[i])
+        except Exception:
+            continue
+        for j in range(i + 1):
+            if j in replays:
+                # One snapshot in memory at a time
+                replay_env = dict(base)
+                replay_env.update(store.load(keys[j - 1]) if j else {})
+                exec(units[j][1], replay_env)
+                del replay_env
+            else:
+                for name in PRINTED_REPORT.findall(units[j][1]):
+                    if name in variables:
+                        print(variables[name])
+        env.update(variables)
+        if "STATS" in env:
+            # Statistics cached by the re-runs belong to older frame versions
+            for name in variables:
+                env["STATS"].invalidate(name)
+        start, replayed = i + 1, len(replays)
+        break
+
+    for i in range(start, len(units)):
+        if run_unit:
+            run_unit(i)
+        else:
+            exec(units[i][1], env)
+        store.save(keys[i], snapshot_variables(env, base_names))
+
+    return start, replayed
+
+
+# =====================================================
+# 11. Streaming Execution (chunked LOAD → row-local → SAVE)
+# =====================================================
+
+STREAM_CHUNK_SIZE = 100_000
+# In automatic mode, only inputs at least this large are streamed
+STREAM_MIN_BYTES = 256 * 1024 * 1024
+
+# Statements that only look at one row at a time
+ROW_LOCAL_STMTS = {
+    "filter_stmt", "filter_range_stmt", "filter_complex_stmt", "search_stmt",
+    "create_col_stmt", "rename_stmt", "drop_col_stmt", "convert_time_stmt",
+}
+
+
+def _statement_name(stmt):
+    return stmt.data[:-len("_stmt")].upper()
+
+
+def statement_label(index, trees):
+    """
+    "3: FILTER" style label of the unit at index (0-based) for traces.
+    """
+    return f"{index + 1}: " + " + ".join(_statement_name(stmt.children[0]) for stmt in trees)
+
+
+def streaming_plan(units):
+    """
+    Checks whether a script can run chunk by chunk: one LOAD of a CSV file
+    first, then only row-local statements and CSV SAVEs on that variable.
+
+    Returns:
+        tuple: (eligible: bool, reason: str, load_path: str or None)
+    """
+    statements = [stmt.children[0] for trees, _ in units for stmt in trees]
+    if not statements or statements[0].data != "load_stmt":
+        return False, "script does not start with LOAD", None
+
+    path = str(statements[0].children[0]).strip('"')
+    var = str(statements[0].children[1])
+    if not path.lower().endswith(".csv"):
+        return False, "input is not a CSV file", path
+    if len(statements[0].children) > 2:
+        # Categories and the memory report are per table, not per chunk
+        return False, "LOAD uses OPTIMIZE, which needs the whole table", path
+
+    has_save = False
+    for index, stmt in enumerate(statements[1:], 2):
+        name = _statement_name(stmt)
+        if stmt.data == "save_stmt":
+            if not str(stmt.children[1]).strip('"').lower().endswith(".csv"):
+                return False, f"statement {index} (SAVE) does not write CSV", path
+            has_save = True
+        elif stmt.data == "clean_stmt":
+            op = stmt.children[1].children[0]
+            target = next((str(t) for t in op.children if t.type == "TARGET"), None)
+            if op.data not in ("drop_all", "drop_specific") or target in ("پرت", "outlier"):
+                return False, f"statement {index} ({name} {op.data.upper()}) needs the whole table", path
+        elif stmt.data not in ROW_LOCAL_STMTS:
+            return False, f"statement {index} ({name}) needs the whole table", path
+        if str(stmt.children[0]) != var:
+            return False, f"statement {index} ({name}) uses another variable", path
+
+    if not has_save:
+        return False, "script has no SAVE to stream into", path
+    return True, "", path
+
+
+def build_streaming_code(units, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Rewrites an eligible script into one read_csv(chunksize=...) loop that
+    runs the row-local statements per chunk and appends each SAVE.
+    """
+    first, *rest = units
+    load = first[0][0].children[0]
+    file_path, var = str(load.children[0]), str(load.children[1])
+
+    body = []
+    for trees, code in rest:
+        stmt = trees[0].children[0]
+        if len(trees) == 1 and stmt.data == "save_stmt":
+            filename = str(stmt.children[1])
+            body.append(f'''
+# --- Save chunk ---
+save_path = os.path.join(OUTPUT_DIR, {filename})
+{var}.to_csv(save_path, mode="w" if first_chunk else "a", header=first_chunk, index=False)''')
+        else:
+            body.append(code)
+
+    loop_body = textwrap.indent("\n".join(body), "    ")
+    return f'''
+# --- Streaming Load ({chunk_size} rows per chunk) ---
+if not os.path.exists({file_path}):
+    raise FileNotFoundError("File not found")
+
+first_chunk = True
+for {var} in pd.read_csv({file_path}, usecols=LOAD_COLUMNS.get(({file_path}, "{var}")), chunksize={chunk_size}):
+{loop_body}
+    first_chunk = False
+'''
+
+
+# =====================================================
+# 12. Tracing (stage / statement spans, Chrome trace export)
+# =====================================================
+
+class Tracer:
+    """
+    Timed spans of one compile. Pipeline stages are always recorded (a few
+    spans per run); with detail=True every statement's parse, transform and
+    execution is recorded too. write_chrome_trace() exports the spans in
+    the Chrome trace-event format (chrome://tracing, ui.perfetto.dev).
+    """
+    def __init__(self, detail=False):
+        self.detail = detail
+        self.origin = self.last = time.perf_counter()
+        self.spans = []
+        self.lock = threading.Lock()
+
+    def _add(self, name, cat, start, end, args):
+        with self.lock:
+            self.spans.append((name, cat, start, end, threading.get_ident(), args))
+
+    @contextmanager
+    def span(self, name, cat="stage", **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, cat, start, time.perf_counter(), args)
+
+    def statement(self, name, cat, **args):
+        """
+        Span of one statement, or a no-op context without detail.
+        """
+        return self.span(name, cat, **args) if self.detail else nullcontext()
+
+    def lap(self, stage):
+        """
+        Records the stage that ran since the previous lap.
+        """
+        now = time.perf_counter()
+        self._add(stage, "stage", self.last, now, {})
+        self.last = now
+
+    def stage_times(self):
+        times = {}
+        for name, cat, start, end, _, _ in self.spans:
+            if cat == "stage":
+                times[name] = times.get(name, 0.0) + end - start
+        return times
+
+    def summary(self, top=10):
+        stages = self.stage_times()
+        total = sum(stages.values()) or 1e-9
+        lines = [f"{'stage':<16}{'ms':>10}{'share':>8}"]
+        for name, seconds in stages.items():
+            lines.append(f"{name:<16}{seconds * 1000:>10.1f}{seconds / total:>8.0%}")
+        lines.append(f"{'total':<16}{total * 1000:>10.1f}")
+        for name, cat, start, end, _, _ in self.spans:
+            if cat == "background":
+                lines.append(f"{name + ' (bg)':<16}{(end - start) * 1000:>10.1f}")
+        statements = sorted((s for s in self.spans if s[1] == "exec"), key=lambda s: s[2] - s[3])[:top]
+        if statements:
+            lines.append("")
+            lines.append("Slowest statements:")
+            lines += [f"{(end - start) * 1000:>10.1f} ms  {name}" for name, _, start, end, _, _ in statements]
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path):
+        pid = os.getpid()
+        tids = {}
+        events = []
+        for name, cat, start, end, tid, args in self.spans:
+            events.append({
+                "name": name, "cat": cat, "ph": "X", "pid": pid,
+                "tid": tids.setdefault(tid, len(tids)),
+                "ts": round((start - self.origin) * 1e6, 1),
+                "dur": round((end - start) * 1e6, 1),
+                "args": args,
+            })
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+
+
+# =====================================================
+# 13. Compiler Pipeline (MODIFIED FOR GUI INTEGRATION)
+# =====================================================
+
+def load_runtime_modules():
+    """
+    Imports pandas and compiler_runtime, which the generated code runs with
+    (matplotlib/seaborn are imported by the plot renderer when needed).
+    """
+    import pandas as pd
+    import compiler_runtime as rt
+    return pd, rt
+
+
+def warm_up():
+    """
+    Loads everything a compile needs ahead of time (used to pre-warm the
+    GUI in the background and by the compile daemon).
+    """
+    load_runtime_modules()
+    # Not pyplot: importing it picks a GUI backend; the plot renderer
+    # selects Agg itself when it first draws in this process
+    import matplotlib  # noqa: F401
+    get_mapper()
+    get_parser()
+
+
+# Output buffer of the compile running in the current thread/context
+_run_output = contextvars.ContextVar("run_output", default=None)
+_stream_lock = threading.Lock()
+
+
+class _RunStream:
+    """
+    Stands in for sys.stdout/sys.stderr: writes go to the buffer of the
+    compile running in the current context, or to the original stream.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        return (_run_output.get() or self.stream).write(text)
+
+    def flush(self):
+        (_run_output.get() or self.stream).flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def _install_run_streams():
+    with _stream_lock:
+        if not isinstance(sys.stdout, _RunStream):
+            sys.stdout = _RunStream(sys.stdout)
+        if not isinstance(sys.stderr, _RunStream):
+            sys.stderr = _RunStream(sys.stderr)
+
+
+class CompileResult:
+    """
+    Outcome of one compile_run call.
+
+    Attributes:
+        success: True when the script compiled and ran
+        log: captured output (empty when output was not captured)
+        error: error message, empty on success
+        report: content of report.txt
+        run_dir: directory holding every artifact of the run
+        artifacts: paths of generated_code, report, plots, ast
+        timings: seconds per pipeline stage
+    """
+    def __init__(self, run_dir):
+        self.success = False
+        self.log = ""
+        self.error = ""
+        self.report = ""
+        self.run_dir = run_dir
+        self.artifacts = {}
+        self.timings = {}
+
+
+def run_compiler(persian_code, capture_output=True, **options):
+    """
+    Runs the compiler pipeline in output/ and writes ./generated_code.py
+    (see compile_run for the options).
+
+    Returns:
+        tuple: (success: bool, output_log: str, error_msg: str)
+    """
+    options.setdefault("code_path", os.path.join("./", "generated_code.py"))
+    result = compile_run(persian_code, "output", capture_output=capture_output, **options)
+    return (result.success, result.log, result.error)
+
+
+def compile_run(persian_code, run_dir, capture_output=True, code_path=None, checkpoint_dir=None,
+                streaming=None, optimize=True, explain=False, plot_workers=None,
+                large_plot_rows=None, plot_cache=True, ast_image="png", trace=False,
+                profile=True, backend="pandas", base_dir=None):
+    """
+    Runs the compiler pipeline with every artifact in run_dir. Output is
+    captured per call, so several compiles can run in parallel threads.
     
     Args:
         persian_code: Persian DSL code as string
+        run_dir: Directory for the plots, report, AST image and caches
         capture_output: If True, captures stdout/stderr instead of printing
+        code_path: Where to write the generated script
+                   (default: run_dir/generated_code.py)
+        checkpoint_dir: If set, snapshots variables after each statement there
+                        and resumes from the longest unchanged statement prefix
+        streaming: None streams eligible scripts on large inputs, True streams
+                   every eligible script, False always runs in memory
+                   (ignored when checkpoint_dir is set)
+        optimize: If True, pushes filters down and fuses adjacent filters
+        explain: If True, prints the logical plan before and after optimization
+        plot_workers: Processes that render the plots (None: one per CPU
+                      for scripts with several plots, 1: in this process)
+        large_plot_rows: Row count above which SCAT/LINE/HIST plots are drawn
+                         as a 2D density / min-max downsampled line / binned
+                         histogram (default: compiler_runtime.LARGE_PLOT_ROWS)
+        plot_cache: If True, copies plots whose statement and data are
+                    unchanged from output/plot_cache instead of rendering
+        ast_image: "png" (Graphviz, SVG fallback), "svg" (built-in layout)
+                   or None to skip the AST image; drawn in the background
+        trace: If True, records a span per statement (parse, transform,
+               execution) and writes run_dir/trace.json (Chrome trace format)
+        profile: If True, measures rows in/out, DataFrame memory and time of
+                 every statement for the report ("deep" counts string memory
+                 too, at the cost of a scan per statement)
+        backend: "pandas", or "polars" to run the script as Polars lazy
+                 queries (statements without a Polars translation run on
+                 pandas; falls back to pandas when Polars is not installed).
+                 With Polars the plan optimizer is left to Polars, and
+                 streaming selects its streaming engine
+        base_dir: Directory relative LOAD and USE_FIT paths resolve against
+                  (default: the working directory); for callers that
+                  share a process, such as the compile server
     
     Returns:
-        tuple: (success: bool, output_log: str, error_msg: str)
+        CompileResult
     """
-    import sys
-    import io
-    
-    OUTPUT_DIR = "output"
+    tracer = Tracer(detail=trace)
+    pd, rt = load_runtime_modules()
+    if large_plot_rows is None:
+        large_plot_rows = rt.LARGE_PLOT_ROWS
+    OUTPUT_DIR = run_dir
     PLOTS_DIR = "plots"
     os.makedirs(OUTPUT_DIR, exist_ok=True)
+    result = CompileResult(OUTPUT_DIR)
+    lap = tracer.lap
+    lap("imports")
     
     # Capture output only when requested (GUI mode)
     if capture_output:
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
+        _install_run_streams()
         captured = io.StringIO()
-        sys.stdout = sys.stderr = captured
+        capture_token = _run_output.set(captured)
     
     try:
-        mapper = PersianToDSLMapper()
-        dsl_code = mapper.translate(persian_code)
+        mapper = get_mapper()
+        dsl_lines = mapper.translate_lines(persian_code)
+        if base_dir is not None:
+            dsl_lines = resolve_input_paths(dsl_lines, base_dir)
+        dsl_code = "\n".join(dsl for _, _, dsl in dsl_lines)
+        lap("translate")
 
         if capture_output:
             captured.write("✓ Intermediate DSL code generated:\n")
@@ -638,21 +2062,81 @@ def run_compiler(persian_code, capture_output=True):
         else:
             print("Intermediate DSL code:\n", dsl_code)
 
-        parser = Lark(grammar, parser="lalr")
-        ast_tree = parser.parse(dsl_code)
-        ast_to_dot(ast_tree, output_name="ast", output_dir=OUTPUT_DIR)
-
-        generator = CodeGenerator(OUTPUT_DIR)
-        python_code = generator.transform(ast_tree)
-
-        gen_path = os.path.join("./", "generated_code.py")
+        pl = None
+        if backend == "polars":
+            try:
+                import polars as pl
+            except ImportError:
+                print("Backend: polars is not installed, using pandas")
+        if pl is not None:
+            from compiler_polars import PolarsCodeGenerator, fallback_statements, lazy_units
+            generator = PolarsCodeGenerator(OUTPUT_DIR)
+        else:
+            generator = CodeGenerator(OUTPUT_DIR)
+
+        parser = get_parser()
+        ast_tree, units, cache_stats = compile_incremental(dsl_lines, parser, generator, tracer=tracer)
+        lap("parse")
+
+        plan = LogicalPlan(units)
+        if explain:
+            print("== Logical plan ==\n" + plan.explain() + "\n")
+        if pl is not None:
+            # Polars pushes filters down and fuses them in its own optimizer
+            fallbacks = fallback_statements(units)
+            print(f"Backend: polars, {len(units) - len(fallbacks)} of {len(units)} statements as lazy queries"
+                  + (f"; pandas for {', '.join(fallbacks)}" if fallbacks else ""))
+        elif optimize:
+            plan.optimize()
+            units = plan.units()
+            if explain:
+                print("== Optimized plan ==\n" + plan.explain() + "\n")
+            if plan.pushed or plan.fused:
+                print(f"Plan optimizer: {plan.pushed} filter moves, {plan.fused} filters fused")
+        units = with_stats_invalidation(units)
+        python_code = "\n".join(code for _, code in units)
+
+        load_columns = prune_load_columns(ast_tree)
+        for (path, var), columns in load_columns.items():
+            generator.add_log("COLUMN PRUNING", f"{var} reads {len(columns)} columns from {path}: {', '.join(columns)}")
+            print(f"Column pruning: {var} reads only {', '.join(columns)} from {path}")
+
+        streamed = False
+        polars_engine = "auto"
+        if pl is not None:
+            inputs = [str(node.children[0]).strip('"') for node in ast_tree.find_data("load_stmt")]
+            if streaming is True or (streaming is None and any(
+                    os.path.isfile(path) and os.path.getsize(path) >= STREAM_MIN_BYTES for path in inputs)):
+                polars_engine = "streaming"
+                print("Streaming mode: Polars streaming engine")
+        elif streaming is not False and not checkpoint_dir:
+            eligible, reason, load_path = streaming_plan(units)
+            wanted = streaming is True or (
+                load_path is not None and os.path.isfile(load_path)
+                and os.path.getsize(load_path) >= STREAM_MIN_BYTES)
+            if eligible and wanted:
+                python_code = build_streaming_code(units)
+                streamed = True
+                print(f"Streaming mode: {STREAM_CHUNK_SIZE} rows per chunk")
+            elif wanted:
+                print(f"Streaming mode not used ({reason}); running in memory")
+        if not capture_output:
+            print(f"Statement cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+        lap("optimize")
+
+        gen_path = code_path or os.path.join(OUTPUT_DIR, "generated_code.py")
         with open(gen_path, "w", encoding="utf-8") as f:
-            f.write("import pandas as pd\nimport matplotlib.pyplot as plt\nimport os\nimport seaborn as sns\nimport warnings\nwarnings.filterwarnings('ignore')\n\n")
+            f.write("import pandas as pd\nimport os\nimport compiler_runtime as rt\nimport warnings\nwarnings.filterwarnings('ignore')\n\n")
+            if pl is not None:
+                f.write(f'import polars as pl\nPOLARS_ENGINE = "{polars_engine}"\n\n')
 
             # Output folders
             f.write(f'OUTPUT_DIR = r"{OUTPUT_DIR}"\n')
             f.write(f'PLOTS_DIR = r"{PLOTS_DIR}"\n')
-            f.write(f'PLOT_PATH = os.path.join(OUTPUT_DIR, PLOTS_DIR)\n\n')
+            f.write(f'PLOT_PATH = os.path.join(OUTPUT_DIR, PLOTS_DIR)\n')
+            f.write(f'LOAD_COLUMNS = {load_columns!r}\n')
+            f.write('STATS = rt.StatsCache()\n')
+            f.write('PLOTS = rt.PlotQueue(cache=rt.PlotCache(os.path.join(OUTPUT_DIR, "plot_cache")))\n\n')
             
             # Make sure folders exist
             f.write('os.makedirs(OUTPUT_DIR, exist_ok=True)\n')
@@ -660,17 +2144,80 @@ def run_compiler(persian_code, capture_output=True):
             
             # Generated code from AST
             f.write(python_code)
+            f.write('\n\nif __name__ == "__main__":\n    for path, error in PLOTS.render():\n        print(f"Plot failed: {path}: {error}")\n')
 
         env = {
         "pd": pd,
-        "plt": plt,
         "os": os,
-        "sns": sns,
+        "rt": rt,
         "OUTPUT_DIR": OUTPUT_DIR,
         "PLOTS_DIR": PLOTS_DIR,
-        "PLOT_PATH": os.path.join(OUTPUT_DIR, PLOTS_DIR)
+        "PLOT_PATH": os.path.join(OUTPUT_DIR, PLOTS_DIR),
+        "LOAD_COLUMNS": load_columns,
+        "STATS": rt.StatsCache(),
+        "PROFILE": rt.ProfileResults(),
+        "PLOTS": rt.PlotQueue(large_plot_rows,
+                              rt.PlotCache(os.path.join(OUTPUT_DIR, "plot_cache")) if plot_cache else None)
         }
-        exec(python_code, env)
+        if pl is not None:
+            env.update({"pl": pl, "POLARS_ENGINE": polars_engine})
+        lap("codegen")
+        profiler = rt.StatementProfiler(env["PROFILE"], deep=profile == "deep") if profile else None
+        statement_ids = {id(stmt): i for i, stmt in enumerate(ast_tree.children)}
+        # Polars statements that only extend a query: their work shows up
+        # in the SAVE or pandas statement that runs it
+        lazy = set(lazy_units(units)) if pl is not None else set()
+
+        def run_unit(i):
+            trees, code = units[i]
+            with tracer.statement(statement_label(i, trees), "exec"):
+                if profiler:
+                    profiler.run([statement_ids[id(t)] for t in trees], unit_frames(trees), code, env,
+                                 lazy=i in lazy)
+                else:
+                    exec(code, env)
+
+        ast_render = None
+        if ast_image:
+            ast_render = ASTRender(ast_tree, OUTPUT_DIR, ast_image, tracer)
+            ast_render.start()
+
+        if checkpoint_dir:
+            restored, replayed = execute_with_checkpoints(units, env, CheckpointStore(checkpoint_dir), run_unit)
+            print(f"Checkpoint: restored {restored} of {len(units)} statements, executed {len(units) - restored}"
+                  + (f", re-ran {replayed} that write files (SAVE, PLOT, SAVE_FIT)" if replayed else ""))
+        elif (trace or profile) and not streamed:
+            for i in range(len(units)):
+                run_unit(i)
+        else:
+            exec(python_code, env)
+        print(env["STATS"].summary())
+        lap("execute")
+
+        plots = env["PLOTS"]
+        plot_failures = plots.render(plot_workers)
+        if plots.rendered or plots.hits:
+            print(plots.summary())
+        if plots.cache and (plots.hits or plots.misses):
+            body = [f"{len(plots.hits)} hits, {len(plots.misses)} misses"]
+            body += [f"hit:  {path}" for path in plots.hits]
+            body += [f"miss: {path}" for path in plots.misses]
+            generator.add_log("PLOT CACHE", "\n".join(body))
+        for path, kind in plots.reduced:
+            generator.add_log("LARGE PLOT", f"{path}\ndrawn as {kind} (more than {large_plot_rows} rows)")
+        for path, error in plot_failures:
+            generator.add_log("PLOT FAILED", f"{path}\n{error}")
+            print(f"Plot failed: {path}: {error}")
+        failed = {path for path, _ in plot_failures}
+        lap("plots")
+
+        ast_path = None
+        if ast_render:
+            ast_render.join()
+            ast_path = ast_render.path
+            if ast_render.error:
+                print(f"AST image failed: {ast_render.error}")
+        lap("ast_wait")
 
         # Generate report with actual values
         report_path = os.path.join(OUTPUT_DIR, "report.txt")
@@ -682,25 +2229,45 @@ def run_compiler(persian_code, capture_output=True):
                     f.write(line.format(**env) + "\n\n")
                 except Exception:
                     f.write(line + "\n\n")
+            lap("report")
+            f.write("=" * 50 + "\n")
+            f.write("زمان‌بندی مراحل (Timing)\n")
+            f.write(tracer.summary() + "\n")
+        with open(report_path, "r", encoding="utf-8") as f:
+            result.report = f.read()
+        result.timings = tracer.stage_times()
+
+        result.artifacts = {
+            "generated_code": gen_path,
+            "report": report_path,
+            "plots": [path for path in plots.hits + plots.misses if path not in failed],
+            "ast": ast_path,
+        }
+        if trace:
+            result.artifacts["trace"] = os.path.join(OUTPUT_DIR, "trace.json")
+            tracer.write_chrome_trace(result.artifacts["trace"])
+        result.success = True
         
         if capture_output:
             # Append report content to output
             captured.write("\n" + "="*50 + "\n")
             captured.write("محتوای گزارش کامل (report.txt):\n")
             captured.write("="*50 + "\n")
-            with open(report_path, "r", encoding="utf-8") as f:
-                captured.write(f.read())
+            captured.write(result.report)
             
             # Success summary
             plots_count = len([f for f in os.listdir(generator.plots_dir) if f.endswith('.png')]) if os.path.exists(generator.plots_dir) else 0
             captured.write(f"\nکامپایل با موفقیت انجام شد!\n")
-            captured.write(f"فایل کد پایتون: {OUTPUT_DIR}/generated_code.py\n")
+            captured.write(f"فایل کد پایتون: {gen_path}\n")
             captured.write(f"تعداد نمودارهای تولید شده: {plots_count}\n")
+            captured.write(f"کش دستورات (statement cache): {cache_stats['hits']} hit / {cache_stats['misses']} miss\n")
             captured.write(f"مسیر نمودارها: {OUTPUT_DIR}/{PLOTS_DIR}/\n")
             captured.write(f"گزارش کامل: {OUTPUT_DIR}/report.txt\n")
-            captured.write(f"درخت تحلیل (AST): {OUTPUT_DIR}/ast.png\n")
+            if ast_path:
+                captured.write(f"درخت تحلیل (AST): {ast_path}\n")
         
-        return (True, captured.getvalue() if capture_output else "", "")
+        result.log = captured.getvalue() if capture_output else ""
+        return result
     
     except Exception as e:
         import traceback
@@ -710,17 +2277,18 @@ def run_compiler(persian_code, capture_output=True):
             captured.write("خطا در پردازش:\n")
             captured.write("="*50 + "\n")
             captured.write(error_msg)
-            return (False, captured.getvalue(), str(e))
+            result.log = captured.getvalue()
+            result.error = str(e)
+            return result
         else:
             raise
     finally:
         if capture_output:
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
+            _run_output.reset(capture_token)
 
 
 # =====================================================
-# 6. CLI Mode (UNCHANGED - Preserved for backward compatibility)
+# 14. CLI Mode (UNCHANGED - Preserved for backward compatibility)
 # =====================================================
 
 def get_user_input():
@@ -760,7 +2328,7 @@ HINT: You may mix Persian and English DSL commands in the same script.
 
 
 # =====================================================
-# 7. Main (UNCHANGED - CLI mode preserved)
+# 15. Main (UNCHANGED - CLI mode preserved)
 # =====================================================
 
 if __name__ == "__main__":
@@ -17,11 +17,15 @@ import threading
 import re
 
 try:
-    from compiler_core import run_compiler
+    from compiler_core import run_compiler, warm_up
 except ImportError:
     messagebox.showerror("Error", "compiler_core.py not found!\nPlease place both files in the same directory.")
     sys.exit(1)
 
+# Load pandas/lark tables in the background once the window is shown,
+# so the first compile does not pay for them
+PREWARM_COMPILER = True
+
 # ==================== TYPO DETECTION (PERSIAN ONLY) ====================
 class TypoSuggester:
     """Detects genuine Persian typos without false positives"""
@@ -57,7 +61,9 @@ class BilingualSuggestionEngine:
         self.fa_templates = {
             "بگیر از": [
                 ('بگیر از "lab_data.csv" به نام df', 'quote'),
-                ('بگیر از "داده‌ها.csv" به نام دیتافریم', 'quote')
+                ('بگیر از "داده‌ها.csv" به نام دیتافریم', 'quote'),
+                ('بگیر از "lab_data.parquet" به نام df', 'quote'),
+                ('بگیر از "lab_data.csv" به نام df بهینه', 'quote')
             ],
             "پاکسازی": [
                 ('پاکسازی df : حذف تکراری', 'colon'),
@@ -78,7 +84,8 @@ class BilingualSuggestionEngine:
             ],
             "ذخیره": [
                 ('ذخیره df : در "processed_data.csv"', 'quote'),
-                ('ذخیره دیتافریم : در "گزارش.xlsx"', 'quote')
+                ('ذخیره دیتافریم : در "گزارش.xlsx"', 'quote'),
+                ('ذخیره df : در "processed_data.parquet"', 'quote')
             ],
             "نمودار": [
                 ('نمودار df : هیستوگرام age', 'colon'),
@@ -113,7 +120,9 @@ class BilingualSuggestionEngine:
         self.en_templates = {
             "LOAD": [
                 ('LOAD "lab_data.csv" INTO df', 'end'),
-                ('LOAD "data.csv" INTO data', 'end')
+                ('LOAD "data.csv" INTO data', 'end'),
+                ('LOAD "lab_data.parquet" INTO df', 'end'),
+                ('LOAD "lab_data.csv" INTO df OPTIMIZE', 'end')
             ],
             "CLEAN": [
                 ('CLEAN df DROP_DUPLICATES', 'end'),
@@ -134,7 +143,8 @@ class BilingualSuggestionEngine:
             ],
             "SAVE": [
                 ('SAVE df TO "processed_data.csv"', 'quote'),
-                ('SAVE results TO "report.xlsx"', 'quote')
+                ('SAVE results TO "report.xlsx"', 'quote'),
+                ('SAVE df TO "processed_data.parquet"', 'quote')
             ],
             "PLOT": [
                 ('PLOT df HIST OF age IN ALL', 'end'),
@@ -402,6 +412,9 @@ class PersianCompilerGUI:
         self.root.bind('<Control-o>', lambda e: self.load_file())
         self.root.bind('<Control-l>', lambda e: self.toggle_language())  # Ctrl+L to toggle language
 
+        if PREWARM_COMPILER:
+            self.root.after(200, lambda: threading.Thread(target=warm_up, daemon=True).start())
+
     def setup_styles(self):
         self.colors = {
             'primary': '#255c82',
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+Polars backend
+Compiles the same AST as CodeGenerator into Polars LazyFrame pipelines
+(scan_csv/scan_parquet, filter, with_columns, join, sort, sink), so
+consecutive statements run as one optimized, multi-threaded query.
+
+Statements without a Polars translation keep the pandas code: their
+frames are collected into pandas DataFrames first (rt.collect) and the
+next Polars statement turns them back into LazyFrames (rt.lazy).
+Report entries come from CodeGenerator, so both backends write the same
+report. Polars itself is only imported by the generated code.
+"""
+
+import ast
+import io
+import tokenize
+
+from lark import Tree
+
+from compiler_core import CodeGenerator, _statement_name
+
+# Marks the code of statements that run on pandas (see fallback_statements)
+FALLBACK_MARK = "# --- pandas fallback ---\n"
+# Files Polars scans and sinks itself (Excel and JSON stay on pandas)
+POLARS_FILES = (".csv", ".parquet", ".feather", ".arrow")
+
+# =====================================================
+# 1. Expression Translation (pandas eval/query → Polars)
+# =====================================================
+
+BIN_OPS = {
+    ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Div: "/", ast.FloorDiv: "//",
+    ast.Mod: "%", ast.Pow: "**", ast.BitAnd: "&", ast.BitOr: "|",
+}
+COMPARE_OPS = {ast.Gt: ">", ast.GtE: ">=", ast.Lt: "<", ast.LtE: "<=", ast.Eq: "==", ast.NotEq: "!="}
+
+
+def _pandas_booleans(expr):
+    # pandas.eval gives & and | the precedence of `and` / `or`
+    # (a < 1 & b > 2 means (a < 1) & (b > 2)), so parse them as such
+    tokens = []
+    for tok in tokenize.generate_tokens(io.StringIO(expr).readline):
+        if tok.type == tokenize.OP and tok.string in ("&", "|"):
+            tokens.append((tokenize.NAME, "and" if tok.string == "&" else "or"))
+        else:
+            tokens.append((tok.type, tok.string))
+    return tokenize.untokenize(tokens)
+
+
+def _expr(node):
+    if isinstance(node, ast.Name):
+        return f"pl.col({node.id!r})"
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str, bool)):
+        return f"pl.lit({node.value!r})"
+    if isinstance(node, ast.BinOp) and type(node.op) in BIN_OPS:
+        return f"({_expr(node.left)} {BIN_OPS[type(node.op)]} {_expr(node.right)})"
+    if isinstance(node, ast.UnaryOp):
+        if isinstance(node.op, ast.USub):
+            return f"(-{_expr(node.operand)})"
+        if isinstance(node.op, ast.UAdd):
+            return _expr(node.operand)
+        return f"(~{_expr(node.operand)})"
+    if isinstance(node, ast.BoolOp):
+        op = " & " if isinstance(node.op, ast.And) else " | "
+        return "(" + op.join(_expr(value) for value in node.values) + ")"
+    if isinstance(node, ast.Compare) and all(type(op) in COMPARE_OPS for op in node.ops):
+        # a < b < c is (a < b) & (b < c), as in pandas
+        parts, left = [], node.left
+        for op, right in zip(node.ops, node.comparators):
+            parts.append(f"({_expr(left)} {COMPARE_OPS[type(op)]} {_expr(right)})")
+            left = right
+        return parts[0] if len(parts) == 1 else "(" + " & ".join(parts) + ")"
+    raise ValueError(f"no Polars translation for {type(node).__name__}")
+
+
+def polars_expression(expr):
+    """
+    Polars code for a pandas eval/query expression over column names and
+    literals (arithmetic, comparisons, and/or/not).
+
+    Returns:
+        str, or None when the expression uses anything else
+        (function or method calls, attributes, @variables, ...)
+    """
+    try:
+        return _expr(ast.parse(_pandas_booleans(expr.strip()), mode="eval").body)
+    except (SyntaxError, ValueError, tokenize.TokenError):
+        return None
+
+
+# =====================================================
+# 2. Code Generator
+# =====================================================
+
+def fallback_frames(node):
+    """
+    Frame variables a pandas statement reads, which must be collected first.
+    """
+    if node.data == "load_stmt":
+        return []
+    if node.data == "merge_stmt":
+        return [str(node.children[0]), str(node.children[1])]
+    # DUPLICATE reads its source, everything else its own frame
+    return [str(node.children[0])]
+
+
+def fallback_statements(units):
+    """
+    Names of the compiled statements that run on pandas.
+    """
+    return [_statement_name(trees[0].children[0]) for trees, code in units if code.startswith(FALLBACK_MARK)]
+
+
+def lazy_units(units):
+    """
+    Indices of the compiled statements that only extend a Polars query
+    (everything translated except SAVE, which runs it).
+    """
+    return [i for i, (trees, code) in enumerate(units)
+            if not code.startswith(FALLBACK_MARK) and trees[0].children[0].data != "save_stmt"]
+
+
+class PolarsCodeGenerator(CodeGenerator):
+    """
+    CodeGenerator that emits Polars LazyFrame code.
+
+    A translated statement first calls the pandas method for its report
+    entry and discards that code; every other statement keeps the pandas
+    code behind an rt.collect of the frames it reads.
+    """
+    backend = "polars"
+
+    def __init__(self, output_dir):
+        super().__init__(output_dir)
+        self.native = False
+
+    def transform(self, tree):
+        parts = []
+        for stmt in tree.children:
+            self.native = False
+            code = super().transform(Tree("start", [stmt]))
+            if not self.native:
+                collect = "".join(f"{var} = rt.collect({var}, POLARS_ENGINE)\n"
+                                  for var in fallback_frames(stmt.children[0]))
+                code = FALLBACK_MARK + collect + code
+            parts.append(code)
+        return "\n".join(parts)
+
+    def _native(self, code):
+        self.native = True
+        return code
+
+    # ---------- LOAD ----------
+    def load_stmt(self, items):
+        file_path, var = items[:2]
+        # OPTIMIZE (pandas dtypes) and Excel files stay on pandas
+        if len(items) > 2 or not str(file_path).strip('"').lower().endswith(POLARS_FILES):
+            return super().load_stmt(items)
+        super().load_stmt(items)
+        return self._native(f'''
+# --- Load Data (Polars, lazy scan) ---
+if not os.path.exists({file_path}):
+    raise FileNotFoundError("File not found")
+{var} = rt.polars_scan({file_path}, LOAD_COLUMNS.get(({file_path}, "{var}")))
+''')
+
+    # ---------- DUPLICATE-SAVE ----------
+    def duplicate_stmt(self, items):
+        source, dest = items
+        super().duplicate_stmt(items)
+        # LazyFrames are immutable, so the copy is free
+        return self._native(f"\n{dest} = rt.lazy({source})\n")
+
+    def save_stmt(self, items):
+        var, filename = items
+        if not str(filename).strip('"').lower().endswith(POLARS_FILES):
+            return super().save_stmt(items)
+        super().save_stmt(items)
+        return self._native(f'''
+# --- Save DataFrame (Polars) ---
+save_path = os.path.join(OUTPUT_DIR, {filename})
+{var} = rt.polars_sink({var}, save_path, POLARS_ENGINE)
+''')
+
+    # ---------- CLEAN ----------
+    def clean_stmt(self, items):
+        var = str(items[0])
+        op = items[1].children[0]
+        params = [str(c) for c in op.children]
+        nulls = ("خالی", "null")
+
+        # NaN is a value to Polars, so it becomes null first (as in pandas)
+        if op.data == "drop_duplicates":
+            code = f"{var} = rt.polars_nulls({var}).unique(keep='first', maintain_order=True)"
+        elif op.data == "drop_all" and params[0] in nulls and len(params) == 1:
+            code = f"{var} = rt.polars_nulls({var}).drop_nulls()"
+        elif op.data == "drop_specific" and params[1] in nulls:
+            code = f'{var} = rt.polars_nulls({var}).drop_nulls(subset=["{params[0]}"])'
+        elif op.data == "fill_specific" and params[1] in nulls:
+            method = "mean" if params[2] in ("میانگین", "mean") else "mode"
+            code = f'{var} = rt.polars_fill(rt.polars_nulls({var}), "{params[0]}", "{method}")'
+        else:
+            # Outliers and FILL_ALL use the pandas engines in compiler_runtime
+            return super().clean_stmt(items)
+        super().clean_stmt(items)
+        return self._native(f"\n# --- Cleaning: {op.data.upper()} (Polars) ---\n{code}")
+
+    # ---------- FILTER ----------
+    def filter_stmt(self, items):
+        var, col, op, val = items
+        super().filter_stmt(items)
+        return self._native(f'{var} = rt.lazy({var}).filter(pl.col("{col}") {op} {val})')
+
+    def filter_range_stmt(self, items):
+        var, col, low, high = items
+        super().filter_range_stmt(items)
+        return self._native(f'{var} = rt.lazy({var}).filter(pl.col("{col}").is_between({low}, {high}))')
+
+    def filter_complex_stmt(self, items):
+        var, raw_condition = items
+        condition = str(raw_condition).replace(" و ", " & ").replace(" یا ", " | ")
+        expr = polars_expression(condition)
+        if expr is None:
+            return super().filter_complex_stmt(items)
+        super().filter_complex_stmt(items)
+        return self._native(f"{var} = rt.lazy({var}).filter({expr})")
+
+    # ---------- SEARCH ----------
+    def search_stmt(self, items):
+        var, col, val = items
+        pattern = "(?i)" + str(val).replace('"', '')
+        super().search_stmt(items)
+        # Case-insensitive regex, missing values never match (as in pandas)
+        return self._native(
+            f'{var} = rt.lazy({var}).filter('
+            f'pl.col("{col}").cast(pl.String).str.contains({pattern!r}).fill_null(False))'
+        )
+
+    # ---------- LEVELING ----------
+    def level_stmt(self, items):
+        var, col = items[0], items[1]
+        levels = sorted(items[2:], key=lambda x: x[0])
+        bins = [v for v, _ in levels]
+        labels = [label for _, label in levels]
+        super().level_stmt(items)
+        return self._native(f'''
+# --- Leveling Of {col} From {var} (Polars) ---
+{var} = rt.polars_level({var}, "{col}", {bins}, {labels})
+''')
+
+    # ---------- SORT ----------
+    def sort_stmt(self, items):
+        var, col, order = items
+        descending = order not in ["صعودی", "ASC"]
+        super().sort_stmt(items)
+        return self._native(
+            f'{var} = rt.lazy({var}).sort("{col}", descending={descending}, nulls_last=True, maintain_order=True)'
+        )
+
+    # ---------- CRUD ----------
+    def merge_stmt(self, items):
+        df1, df2, key = items
+        super().merge_stmt(items)
+        return self._native(f'{df1} = rt.polars_merge({df1}, {df2}, "{key}")')
+
+    def create_col_stmt(self, items):
+        var, new_col, expr = items
+        polars_expr = polars_expression(str(expr))
+        if polars_expr is None:
+            return super().create_col_stmt(items)
+        super().create_col_stmt(items)
+        return self._native(f'{var} = rt.polars_with_column({var}, "{new_col}", {polars_expr})')
+
+    def drop_col_stmt(self, items):
+        var, col = items
+        super().drop_col_stmt(items)
+        return self._native(f'{var} = rt.lazy({var}).drop("{col}")')
+
+    def rename_stmt(self, items):
+        var, old_name, new_name = items
+        super().rename_stmt(items)
+        return self._native(f'{var} = rt.lazy({var}).rename({{"{old_name}": "{new_name}"}})')
+
+    def convert_time_stmt(self, items):
+        var, col = items
+        super().convert_time_stmt(items)
+        return self._native(
+            f'{var} = rt.lazy({var}).with_columns(pl.col("{col}").cast(pl.String).str.to_datetime())'
+        )
+
+    # ---------- NORMALIZE ----------
+    def normalize_stmt(self, items):
+        var, col = items
+        super().normalize_stmt(items)
+        return self._native(f'''
+# --- Min-Max Normalization (Polars) ---
+{var} = rt.polars_with_column({var}, "{col}", (pl.col("{col}") - pl.col("{col}").min()) / (pl.col("{col}").max() - pl.col("{col}").min()))
+''')
@@ -0,0 +1,828 @@
+# -*- coding: utf-8 -*-
+"""
+Runtime helpers for the generated code
+The generated script imports this module as `rt`; everything here runs
+at execution time, not at compile time.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# =====================================================
+# 1. Memory-optimized dtypes (LOAD ... OPTIMIZE)
+# =====================================================
+
+DTYPE_SAMPLE_ROWS = 10_000
+# Text columns with at most this share of distinct values become categoricals
+CATEGORY_MAX_RATIO = 0.5
+
+
+def _text_dtype():
+    try:
+        import pyarrow  # noqa: F401
+        return "string[pyarrow]"
+    except ImportError:
+        return "string"
+
+
+def _compact_numeric(s):
+    """
+    Downcasts a float column to float32 when every value survives the
+    round trip. Integers keep their type: a narrower one wraps silently
+    in later CREATE_COL/FILTER arithmetic (int32 3000 * 1000000).
+    """
+    if pd.api.types.is_float_dtype(s.dtype) and s.dtype != np.float32:
+        small = s.astype(np.float32)
+        same = (small.astype(s.dtype) == s) | s.isna()
+        if same.all():
+            return small
+    return s
+
+
+def optimize_dtypes(df, sample_rows=DTYPE_SAMPLE_ROWS):
+    """
+    Converts columns to compact dtypes: low-cardinality text -> category,
+    other text -> Arrow-backed (or nullable) strings, floats -> float32.
+    Cardinality is judged on a sample of sample_rows rows.
+
+    Returns:
+        tuple: (optimized DataFrame, per-column memory report as text)
+    """
+    before = df.memory_usage(deep=True, index=False)
+    old_dtypes = df.dtypes
+    sample = df.sample(n=sample_rows, random_state=0) if len(df) > sample_rows else df
+
+    df = df.copy(deep=False)
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_bool_dtype(s.dtype) or isinstance(s.dtype, pd.CategoricalDtype):
+            continue
+        if pd.api.types.is_numeric_dtype(s.dtype):
+            df[col] = _compact_numeric(s)
+        elif pd.api.types.is_object_dtype(s.dtype) or pd.api.types.is_string_dtype(s.dtype):
+            values = sample[col].dropna()
+            if len(values) == 0:
+                continue
+            if values.nunique() / len(values) <= CATEGORY_MAX_RATIO:
+                df[col] = s.astype("category")
+            elif pd.api.types.infer_dtype(values, skipna=True) == "string":
+                df[col] = s.astype(_text_dtype())
+
+    after = df.memory_usage(deep=True, index=False)
+    lines = [f"{'column':<20}{'dtype':<32}{'before KB':>12}{'after KB':>12}"]
+    for col in df.columns:
+        dtype = f"{old_dtypes[col]} -> {df[col].dtype}"
+        lines.append(f"{str(col):<20}{dtype:<32}{before[col] / 1024:>12.1f}{after[col] / 1024:>12.1f}")
+    lines.append(f"{'total':<52}{before.sum() / 1024:>12.1f}{after.sum() / 1024:>12.1f}")
+    return df, "\n".join(lines)
+
+
+# =====================================================
+# 2. IQR Outlier Engine (CLEAN ... outlier)
+# =====================================================
+
+def iqr_bounds(num):
+    """
+    Lower/upper 1.5*IQR fences of every column, from one quantile call.
+    """
+    q = num.quantile([0.25, 0.75])
+    iqr = q.loc[0.75] - q.loc[0.25]
+    return q.loc[0.25] - 1.5 * iqr, q.loc[0.75] + 1.5 * iqr
+
+
+def _numeric_columns(df, columns):
+    return df[list(columns)] if columns else df.select_dtypes(include=["number"])
+
+
+def _counts_report(counts):
+    return "\n".join(f"{col}: {int(n)}" for col, n in counts.items()) or "(no numeric columns)"
+
+
+def drop_outliers(df, columns=None, mode="sequential"):
+    """
+    Drops rows outside the IQR fences (rows with missing values in the
+    checked columns are dropped as well).
+
+    mode="sequential" (default, the original behaviour): columns are
+    filtered one after another and each column's fences are computed on
+    the rows left by the previous ones.
+    mode="simultaneous": fences come from the input frame and all columns
+    are checked at once, so the result does not depend on column order.
+
+    Returns:
+        tuple: (filtered DataFrame, rows flagged per column as text)
+    """
+    num = _numeric_columns(df, columns)
+    if mode == "sequential":
+        flagged = {}
+        for col in num.columns:
+            low, high = iqr_bounds(df[[col]])
+            keep = (df[col] >= low[col]) & (df[col] <= high[col])
+            flagged[col] = int((~keep).sum())
+            df = df[keep]
+        return df, _counts_report(flagged)
+
+    low, high = iqr_bounds(num)
+    inside = num.ge(low) & num.le(high)
+    return df[inside.all(axis=1)], _counts_report((~inside).sum())
+
+
+def fill_outliers(df, method, columns=None):
+    """
+    Replaces values outside the IQR fences with the column mean or mode.
+    Every column only depends on itself, so all columns are done in one step.
+
+    Returns:
+        tuple: (DataFrame, values replaced per column as text)
+    """
+    num = _numeric_columns(df, columns)
+    low, high = iqr_bounds(num)
+    outside = num.lt(low) | num.gt(high)
+    fill = num.mean() if method == "mean" else num.mode().iloc[0]
+
+    df = df.copy(deep=False)
+    df[num.columns] = num.mask(outside, fill, axis=1)
+    return df, _counts_report(outside.sum())
+
+
+# =====================================================
+# 3. Missing-Value Imputation (CLEAN ... FILL_ALL null)
+# =====================================================
+
+def fit_fill_values(df, method):
+    """
+    Fill value of every column that has missing values, in one pass:
+    mean for numeric columns (when method is "mean"), mode otherwise.
+    """
+    missing = df.columns[df.isna().any()]
+    numeric = [c for c in missing if pd.api.types.is_numeric_dtype(df[c].dtype)]
+    values = {}
+    if method == "mean" and numeric:
+        values.update(df[numeric].mean().to_dict())
+        mode_columns = [c for c in missing if c not in numeric]
+    else:
+        mode_columns = list(missing)
+    if mode_columns:
+        modes = df[mode_columns].mode()
+        if len(modes):
+            values.update(modes.iloc[0].to_dict())
+    # Columns that are entirely empty have no statistic to fill with
+    return {col: value for col, value in values.items() if not pd.isna(value)}
+
+
+def impute_missing(df, method, fit_path=None, save_fit=False):
+    """
+    Fills missing values with one fillna(dict) call.
+
+    fit_path + save_fit=True:  fits the values and writes them as JSON
+    fit_path + save_fit=False: reuses values fitted on an earlier run
+
+    Returns:
+        tuple: (filled DataFrame, values filled per column as text)
+    """
+    import json
+
+    if fit_path and not save_fit:
+        with open(fit_path, "r", encoding="utf-8") as f:
+            values = json.load(f)
+    else:
+        values = fit_fill_values(df, method)
+        if fit_path:
+            with open(fit_path, "w", encoding="utf-8") as f:
+                json.dump({col: value.item() if hasattr(value, "item") else value
+                           for col, value in values.items()}, f, ensure_ascii=False, indent=2, default=str)
+
+    values = {col: value for col, value in values.items() if col in df.columns}
+    counts = df[list(values)].isna().sum() if values else pd.Series(dtype="int64")
+    df = df.fillna(values)
+    lines = [f"{col}: {int(counts[col])} filled with {values[col]}" for col in values if counts[col]]
+    return df, "\n".join(lines) or "(no missing values)"
+
+
+# =====================================================
+# 4. Statistics Cache (CALC, FILL_SPECIFIC, NORMALIZE, MEAN plots)
+# =====================================================
+
+class StatsCache:
+    """
+    Column statistics of the frames of a running script, keyed by
+    (variable, data version, column, statistic). The generated code calls
+    invalidate(var) after every statement that changes a frame, which
+    starts a new version, so each statistic is computed at most once per
+    version of the data.
+    """
+    def __init__(self):
+        self.versions = {}
+        self.values = {}
+        self.computed = 0
+        self.reused = 0
+
+    def invalidate(self, var):
+        self.versions[var] = self.versions.get(var, 0) + 1
+        self.values.pop(var, None)
+
+    def _lookup(self, var):
+        version = self.versions.get(var, 0)
+        cached = self.values.get(var)
+        if cached is None or cached[0] != version:
+            cached = self.values[var] = (version, {})
+        return cached[1]
+
+    def agg(self, var, df, wanted):
+        """
+        Returns {(column, stat): value} for wanted = {column: [stats]}.
+        Missing statistics are computed together in one DataFrame.agg call
+        ("mode" separately, as it is not a reduction).
+        """
+        cache = self._lookup(var)
+        missing = {}
+        for col, stats in wanted.items():
+            for stat in stats:
+                if (col, stat) in cache:
+                    self.reused += 1
+                else:
+                    missing.setdefault(col, []).append(stat)
+
+        reductions = {col: [s for s in stats if s != "mode"] for col, stats in missing.items()}
+        reductions = {col: stats for col, stats in reductions.items() if stats}
+        if reductions:
+            result = df.agg(reductions)
+            for col, stats in reductions.items():
+                for stat in stats:
+                    cache[(col, stat)] = result.at[stat, col]
+                    self.computed += 1
+        for col, stats in missing.items():
+            if "mode" in stats:
+                cache[(col, "mode")] = df[col].mode()[0]
+                self.computed += 1
+
+        return {(col, stat): cache[(col, stat)] for col, stats in wanted.items() for stat in stats}
+
+    def grouped(self, var, df, by, col, op):
+        """
+        Cached df.groupby(by)[col].<op>() (shared by GROUPBY and MEAN plots).
+        """
+        cache = self._lookup(var)
+        key = (col, f"{op}_by:{by}")
+        if key in cache:
+            self.reused += 1
+        else:
+            cache[key] = getattr(df.groupby(by, observed=True)[col], op)()
+            self.computed += 1
+        return cache[key]
+
+    def summary(self):
+        return f"Statistics cache: {self.computed} computed, {self.reused} reused"
+
+
+# =====================================================
+# 5. Deferred Plot Rendering (PLOT)
+# =====================================================
+
+# Starting a worker costs about a second (it imports pandas and matplotlib),
+# so by default smaller scripts render in-process
+PLOT_POOL_MIN_PLOTS = 4
+# pyplot keeps one "current figure" per process: in-process renders of
+# compiles running in parallel threads take turns
+PYPLOT_LOCK = threading.Lock()
+
+
+# Above this many rows, SCAT/LINE/HIST plots are reduced before queuing
+LARGE_PLOT_ROWS = 200_000
+DENSITY_BINS = 200
+HIST_BINS = 20
+LINE_BUCKETS = 4_000
+
+
+def _is_numeric(*series):
+    return all(pd.api.types.is_numeric_dtype(s.dtype) for s in series)
+
+
+def density_grid(x, y, bins=DENSITY_BINS):
+    """
+    2D histogram of a scatter plot: (counts, x edges, y edges).
+    """
+    keep = x.notna().to_numpy() & y.notna().to_numpy()
+    return np.histogram2d(x.to_numpy()[keep], y.to_numpy()[keep], bins=bins)
+
+
+def downsample_line(x, y, buckets=LINE_BUCKETS):
+    """
+    Min/max-preserving downsampling: the points are split into buckets in
+    their original order and the minimum and maximum of every bucket are
+    kept (plus the end points), so peaks survive.
+    """
+    values = y.to_numpy()
+    pos = np.flatnonzero(~pd.isna(values))
+    if len(pos) <= 2 * buckets:
+        return x, y
+    bucket = np.arange(len(pos)) * buckets // len(pos)
+    ordered = pd.Series(values[pos].astype(float), index=pos)
+    groups = ordered.groupby(bucket)
+    keep = np.union1d(groups.idxmin().to_numpy(), groups.idxmax().to_numpy())
+    keep = np.union1d(keep, [pos[0], pos[-1]])
+    return x.iloc[keep], y.iloc[keep]
+
+
+def reduce_plot(kind, data, large_rows=LARGE_PLOT_ROWS):
+    """
+    Replaces the raw columns of a large numeric SCAT/LINE/HIST plot with a
+    bounded summary, so drawing (and shipping data to a worker) costs the
+    same for any row count. Smaller or non-numeric inputs are unchanged.
+
+    Returns:
+        tuple: (kind, data, reduced: bool)
+    """
+    if kind not in ("SCAT", "LINE", "HIST") or len(data[0]) <= large_rows or not _is_numeric(*data):
+        return kind, data, False
+    if kind == "SCAT":
+        return "SCAT_DENSITY", density_grid(*data), True
+    if kind == "LINE":
+        return "LINE", downsample_line(*data), True
+    values = data[0].dropna().to_numpy()
+    return "HIST_BINS", np.histogram(values, bins=HIST_BINS), True
+
+
+def _init_plot_worker():
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+
+
+def render_plot(spec):
+    """
+    Draws and saves one queued plot with the same matplotlib calls the
+    serial code used, so the PNG is identical.
+
+    Returns:
+        tuple: (path, error message or None)
+    """
+    import matplotlib.pyplot as plt
+
+    kind, path, title, data = spec
+    try:
+        plt.figure(figsize=(10, 6))
+        if kind == "HIST":
+            data[0].hist(bins=20)
+        elif kind == "MEAN":
+            data[0].plot(kind="bar")
+        elif kind == "LINE":
+            plt.plot(data[0], data[1], color="red")
+        elif kind == "SCAT":
+            plt.scatter(data[0], data[1], edgecolors="black", s=50)
+        elif kind == "SCAT_DENSITY":
+            from matplotlib.colors import LogNorm
+            counts, x_edges, y_edges = data
+            plt.pcolormesh(x_edges, y_edges, np.ma.masked_equal(counts.T, 0), cmap="viridis", norm=LogNorm())
+            plt.colorbar(label="rows")
+        elif kind == "HIST_BINS":
+            counts, edges = data
+            plt.bar(edges[:-1], counts, width=np.diff(edges), align="edge")
+            plt.grid(True)
+        elif kind == "BOX":
+            frame, column, by = data
+            frame.boxplot(column=column, by=by)
+        elif kind == "HEATMAP":
+            import seaborn as sns
+            sns.heatmap(data[0], annot=True, cmap="coolwarm")
+        plt.title(title)
+        if kind == "BOX":
+            plt.suptitle("")
+        plt.tight_layout()
+        plt.savefig(path, dpi=150)
+        return path, None
+    except Exception as e:
+        return path, f"{type(e).__name__}: {e}"
+    finally:
+        plt.close("all")
+
+
+# Bump when render_plot changes how figures look, to invalidate PlotCache
+RENDER_VERSION = 1
+
+
+def data_fingerprint(data, h):
+    """
+    Feeds the content of plot data (frames, series, arrays, scalars and
+    tuples of them) into the hash object h.
+    """
+    if isinstance(data, (pd.Series, pd.DataFrame)):
+        h.update(repr((type(data).__name__, getattr(data, "name", None),
+                       list(getattr(data, "columns", [])), str(data.index.dtype))).encode())
+        h.update(repr(data.dtypes.tolist() if isinstance(data, pd.DataFrame) else data.dtype).encode())
+        h.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    elif isinstance(data, np.ndarray):
+        h.update(repr((data.dtype, data.shape)).encode())
+        h.update(np.ascontiguousarray(data).tobytes())
+    elif isinstance(data, (tuple, list)):
+        h.update(f"seq{len(data)}".encode())
+        for item in data:
+            data_fingerprint(item, h)
+    else:
+        h.update(repr(data).encode())
+
+
+def plot_key(spec):
+    """
+    Content hash of a queued plot: its statement (kind and title) and the
+    data it draws. The output path is not part of it.
+    """
+    import hashlib
+    import matplotlib
+
+    kind, _, title, data = spec
+    h = hashlib.sha256(repr((RENDER_VERSION, matplotlib.__version__, kind, title)).encode())
+    data_fingerprint(data, h)
+    return h.hexdigest()
+
+
+class PlotCache:
+    """
+    Rendered PNGs keyed by plot_key. Least recently used images are evicted
+    once the directory grows beyond max_bytes.
+    """
+    def __init__(self, directory, max_bytes=256 * 1024 ** 2):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.png")
+
+    def restore(self, key, dest):
+        """
+        Copies the cached image of key to dest; False when there is none.
+        """
+        import shutil
+
+        path = self.path(key)
+        try:
+            shutil.copyfile(path, dest)
+            # Mark as recently used
+            os.utime(path)
+            return True
+        except OSError:
+            return False
+
+    def store(self, key, src):
+        import shutil
+
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".png"):
+                st = os.stat(os.path.join(self.directory, name))
+                files.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+
+
+class PlotQueue:
+    """
+    Plots of a running script. PLOT statements only capture the data they
+    draw (already aggregated for MEAN and HEATMAP, reduced by reduce_plot
+    for large inputs); render() then draws all figures at the end, in a
+    pool of processes using the Agg backend. With a PlotCache, plots whose
+    content hash was rendered before are copied from the cache instead.
+    """
+    def __init__(self, large_rows=LARGE_PLOT_ROWS, cache=None):
+        self.large_rows = large_rows
+        self.cache = cache
+        self.specs = []
+        self.reduced = []
+        self.hits = []
+        self.misses = []
+        self.rendered = 0
+        self.workers = 0
+
+    def submit(self, kind, path, title, *data):
+        kind, data, reduced = reduce_plot(kind, data, self.large_rows)
+        if reduced:
+            self.reduced.append((path, kind))
+        self.specs.append((kind, path, title, data))
+
+    def render(self, workers=None):
+        """
+        Renders every queued plot. workers=None uses one process per CPU
+        (from PLOT_POOL_MIN_PLOTS plots on), workers <= 1 renders in this
+        process. Callers of a pool need the usual `if __name__ == "__main__"`
+        guard, as workers are spawned.
+
+        Returns:
+            list: (path, error message) of every plot that failed
+        """
+        queued, self.specs = self.specs, []
+        specs, keys = [], []
+        for spec in queued:
+            key = plot_key(spec) if self.cache else None
+            if key and self.cache.restore(key, spec[1]):
+                self.hits.append(spec[1])
+            else:
+                specs.append(spec)
+                keys.append(key)
+
+        if workers is None:
+            workers = (os.cpu_count() or 1) if len(specs) >= PLOT_POOL_MIN_PLOTS else 1
+        workers = min(workers, len(specs))
+
+        if not specs:
+            results = []
+        elif workers <= 1:
+            if "matplotlib.pyplot" not in sys.modules:
+                # Nobody uses pyplot in this process yet: draw off-screen
+                _init_plot_worker()
+            with PYPLOT_LOCK:
+                results = [render_plot(spec) for spec in specs]
+        else:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # spawn: forking a process that runs a Tk event loop is unsafe
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                     initializer=_init_plot_worker) as pool:
+                futures = [pool.submit(render_plot, spec) for spec in specs]
+                results = []
+                for spec, future in zip(specs, futures):
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        results.append((spec[1], f"{type(e).__name__}: {e}"))
+
+        for key, (path, error) in zip(keys, results):
+            if key and not error:
+                self.cache.store(key, path)
+        self.misses.extend(spec[1] for spec in specs)
+        self.rendered += len(specs)
+        self.workers = max(workers, 1) if specs else 0
+        return [(path, error) for path, error in results if error]
+
+    def summary(self):
+        text = f"Plots: {self.rendered} rendered with {self.workers} worker(s)"
+        if self.cache:
+            text += f", {len(self.hits)} from cache"
+        if self.reduced:
+            text += f", {len(self.reduced)} reduced for large inputs"
+        return text
+
+
+# =====================================================
+# 6. Statement Profile (runtime lines of the report)
+# =====================================================
+
+class ProfileResults(dict):
+    """
+    Runtime line per statement index; report blocks read it through
+    {PROFILE[i]} placeholders.
+    """
+    def __missing__(self, key):
+        return "not measured"
+
+
+def _kb(n):
+    return f"{n / 1024:,.1f} KB"
+
+
+class StatementProfiler:
+    """
+    Runs statements one at a time and records, for the frames they use,
+    rows and DataFrame.memory_usage before/after, plus wall time.
+    """
+    def __init__(self, results, deep=False):
+        self.results = results
+        self.deep = deep
+
+    def _measure(self, env, frames):
+        sizes = {}
+        for var in frames:
+            df = env.get(var)
+            if isinstance(df, pd.DataFrame):
+                sizes[var] = (len(df), int(df.memory_usage(index=True, deep=self.deep).sum()))
+        return sizes
+
+    def run(self, statement_ids, frames, code, env, lazy=False):
+        """
+        lazy=True marks a statement that only builds a Polars query; its
+        build time would hide the real cost, which lands on the statement
+        that collects the query.
+        """
+        if lazy:
+            exec(code, env)
+            for i in statement_ids:
+                self.results[i] = "not measured (lazy)"
+            return
+        before = self._measure(env, frames)
+        start = time.perf_counter()
+        exec(code, env)
+        elapsed = time.perf_counter() - start
+        after = self._measure(env, frames)
+
+        parts = []
+        for var in frames:
+            if var not in after:
+                continue
+            rows, mem = after[var]
+            if var in before:
+                old_rows, old_mem = before[var]
+                parts.append(f"{var}: rows {old_rows:,} -> {rows:,} ({rows - old_rows:+,}), "
+                             f"memory {_kb(old_mem)} -> {_kb(mem)} ({(mem - old_mem) / 1024:+,.1f} KB)")
+            else:
+                parts.append(f"{var}: rows {rows:,}, memory {_kb(mem)}")
+        parts.append(f"time {elapsed * 1000:,.1f} ms")
+        text = "; ".join(parts)
+        for i in statement_ids:
+            self.results[i] = text
+
+
+# =====================================================
+# 7. Polars Backend (compile_run(..., backend="polars"))
+# =====================================================
+
+# Rows Polars reads to infer CSV column types (pandas reads them all);
+# polars_scan re-infers from the whole file when a later value disagrees
+CSV_SCHEMA_ROWS = 100_000
+# pandas.read_csv's default na_values, so both backends see the same nulls
+PANDAS_NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+
+def _polars():
+    import polars as pl
+    return pl
+
+
+def lazy(frame):
+    """
+    The frame as a Polars LazyFrame (pandas NaN becomes null).
+    """
+    pl = _polars()
+    if isinstance(frame, pl.LazyFrame):
+        return frame
+    if isinstance(frame, pl.DataFrame):
+        return frame.lazy()
+    return pl.from_pandas(frame).lazy()
+
+
+def collect(frame, engine="auto"):
+    """
+    The frame as a pandas DataFrame, running its pending Polars query.
+    """
+    if isinstance(frame, pd.DataFrame):
+        return frame
+    pl = _polars()
+    if isinstance(frame, pl.LazyFrame):
+        frame = frame.collect(engine=engine)
+    return frame.to_pandas()
+
+
+def polars_nulls(frame):
+    """
+    Float NaN as null, the one missing value Polars drops, fills and
+    compares like pandas does NaN.
+    """
+    pl = _polars()
+    return lazy(frame).with_columns(pl.col(pl.Float32, pl.Float64).fill_nan(None))
+
+
+def _scan_csv(path, columns):
+    pl = _polars()
+    frame = pl.scan_csv(path, infer_schema_length=CSV_SCHEMA_ROWS, null_values=PANDAS_NA_VALUES)
+    if columns:
+        frame = frame.select(columns)
+    # Parsing the typed columns once finds values the inferred types can't
+    # hold (an int column with 1.5 after CSV_SCHEMA_ROWS rows) here rather
+    # than mid-script; pandas infers from every row, so re-infer from all
+    typed = [name for name, dtype in frame.collect_schema().items() if dtype != pl.String]
+    if typed:
+        try:
+            frame.select(pl.col(typed).null_count()).collect(engine="streaming")
+        except pl.exceptions.ComputeError:
+            frame = pl.scan_csv(path, infer_schema_length=None, null_values=PANDAS_NA_VALUES)
+            if columns:
+                frame = frame.select(columns)
+    return frame
+
+
+def polars_scan(path, columns=None):
+    pl = _polars()
+    lower = path.lower()
+    if lower.endswith(".csv"):
+        return polars_nulls(_scan_csv(path, columns))
+    frame = pl.scan_parquet(path) if lower.endswith(".parquet") else pl.scan_ipc(path)
+    return polars_nulls(frame.select(columns) if columns else frame)
+
+
+def _csv_datetimes(frame):
+    # Datetimes as DataFrame.to_csv writes them: the date alone when a
+    # column is all midnights, microseconds only when some value has them
+    pl = _polars()
+    columns = []
+    for name, dtype in frame.collect_schema().items():
+        if dtype == pl.Datetime:
+            c = pl.col(name)
+            columns.append(
+                pl.when(((c.dt.truncate("1d") == c) | c.is_null()).all())
+                .then(c.dt.strftime("%Y-%m-%d"))
+                .when((c.dt.microsecond() != 0).any())
+                .then(c.dt.strftime("%Y-%m-%d %H:%M:%S%.6f"))
+                .otherwise(c.dt.strftime("%Y-%m-%d %H:%M:%S"))
+                .alias(name)
+            )
+    return frame.with_columns(columns) if columns else frame
+
+
+def polars_sink(frame, path, engine="auto"):
+    """
+    Writes the frame by file extension. Returns the frame to keep using:
+    in memory the collected result (so later statements don't run the
+    query again); with the streaming engine the query itself, as the
+    result is written batch by batch and never held in memory.
+    """
+    frame = lazy(frame)
+    lower = path.lower()
+    kind = "csv" if lower.endswith(".csv") else "parquet" if lower.endswith(".parquet") else "ipc"
+    if engine == "streaming":
+        getattr(_csv_datetimes(frame) if kind == "csv" else frame, f"sink_{kind}")(path, engine="streaming")
+        return frame
+    data = frame.collect(engine=engine)
+    getattr(_csv_datetimes(data.lazy()).collect() if kind == "csv" else data, f"write_{kind}")(path)
+    return data.lazy()
+
+
+def polars_with_column(frame, name, expr):
+    """
+    Adds or replaces a column. Float results keep missing values as null
+    (0/0 would be NaN), which Polars, unlike pandas, sorts and compares
+    as a number.
+    """
+    pl = _polars()
+    frame = lazy(frame).with_columns(expr.alias(name))
+    if frame.collect_schema()[name].is_float():
+        frame = frame.with_columns(pl.col(name).fill_nan(None))
+    return frame
+
+
+def polars_fill(frame, col, method):
+    """
+    CLEAN ... FILL_SPECIFIC null: fills with the mean or the smallest mode
+    (pandas' mode()[0]).
+    """
+    pl = _polars()
+    c = pl.col(col)
+    value = c.mean() if method == "mean" else c.drop_nulls().mode().min()
+    return lazy(frame).with_columns(c.fill_null(value))
+
+
+def polars_merge(left, right, key):
+    """
+    Inner join with pandas.merge semantics: left row order, missing keys
+    match each other, overlapping columns get _x/_y suffixes.
+    """
+    pl = _polars()
+    left, right = lazy(left), lazy(right)
+    left_schema, right_schema = left.collect_schema(), right.collect_schema()
+
+    overlap = (set(left_schema.names()) & set(right_schema.names())) - {key}
+    left = left.rename({c: f"{c}_x" for c in overlap})
+    right = right.rename({c: f"{c}_y" for c in overlap})
+
+    # pandas compares category/str keys by text and int/float keys by value
+    types = (left_schema[key], right_schema[key])
+    if types[0] != types[1]:
+        text = any(t == pl.String or isinstance(t, (pl.Categorical, pl.Enum)) for t in types)
+        common = pl.String if text else pl.Float64
+        left = left.with_columns(pl.col(key).cast(common))
+        right = right.with_columns(pl.col(key).cast(common))
+    return left.join(right, on=key, how="inner", nulls_equal=True, maintain_order="left_right")
+
+
+def polars_level(frame, col, bins, labels):
+    """
+    LEVELING: like pd.cut(col, bins + [inf], labels, right=False); values
+    below the first bin and missing values get no level.
+    """
+    pl = _polars()
+    x = pl.col(col).cast(pl.Float64).fill_nan(None)
+    level = pl.lit(None, dtype=pl.String)
+    for low, label in zip(bins, labels):
+        level = pl.when(x >= low).then(pl.lit(label)).otherwise(level)
+    return lazy(frame).with_columns(level.cast(pl.Enum(labels)).alias(f"{col}_level"))
@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+"""
+Warm compile daemon
+A long-lived local HTTP server that keeps the mapper, the parser and
+pandas/matplotlib/seaborn loaded, so a compile request pays none of the
+start-up cost. This module only imports the standard library at the top,
+so the client command starts instantly.
+
+Usage:
+    python compiler_server.py serve [--port 8765] [--workers 4] [--max-queue 32]
+    python compiler_server.py submit script.txt [--name lab1]
+    python compiler_server.py stats
+
+API (JSON over http://127.0.0.1:<port>):
+    POST /compile  {"code": "...", "name": "lab1", "cwd": "/abs/dir", "options": {...}}
+                   -> CompileResult fields + queue_ms / latency_ms
+    GET  /stats    -> request counts and latency percentiles
+    GET  /health
+
+Only local pages may call it: a POST must be application/json and any
+Origin header must name a loopback host, so a web page cannot make the
+browser submit scripts. Relative LOAD paths resolve against the
+request's cwd (the client sends its own); SAVE paths are relative to the
+run directory. Unnamed runs keep the last `keep_runs` run directories.
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+DEFAULT_PORT = 8765
+# compile_run keyword arguments a request may set (no checkpoint_dir:
+# checkpoints are unpickled, so their directory is not the caller's choice)
+REQUEST_OPTIONS = {
+    "streaming", "optimize", "explain", "plot_workers",
+    "large_plot_rows", "plot_cache", "ast_image", "trace", "profile",
+    "backend",
+}
+RUN_NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+UNNAMED_RUN = re.compile(r"^run_(\d{6})$")
+LOCAL_HOSTS = {"127.0.0.1", "localhost", "::1"}
+
+
+def check_name(name):
+    """
+    Validates a request's run directory name (None for an unnamed run).
+    """
+    if name is None:
+        return None
+    if not isinstance(name, str) or not RUN_NAME.match(name) or name in (".", ".."):
+        raise ValueError('"name" may only use letters, digits, "_", "-" and "."')
+    return name
+
+
+def check_request(request):
+    """
+    Validates a decoded /compile request body.
+
+    Raises:
+        ValueError: a field has the wrong type, the name is not a plain
+                    directory name or cwd is not an existing absolute directory
+    """
+    if not isinstance(request, dict) or not isinstance(request.get("code"), str):
+        raise ValueError('"code" must be a string')
+    check_name(request.get("name"))
+    if not isinstance(request.get("options", {}), dict):
+        raise ValueError('"options" must be an object')
+    cwd = request.get("cwd")
+    if cwd is not None and not (isinstance(cwd, str) and os.path.isabs(cwd) and os.path.isdir(cwd)):
+        raise ValueError('"cwd" must be an existing absolute directory')
+
+
+def is_local(url_or_host):
+    """
+    True when an Origin URL or a Host header names a loopback host.
+    """
+    if "://" not in url_or_host:
+        url_or_host = "http://" + url_or_host
+    try:
+        return urlsplit(url_or_host).hostname in LOCAL_HOSTS
+    except ValueError:
+        return False
+
+# =====================================================
+# 1. Server
+# =====================================================
+
+def percentiles(values, points=(50, 90, 99)):
+    """
+    Nearest-rank percentiles of values, in milliseconds.
+    """
+    if not values:
+        return {}
+    ordered = sorted(values)
+    result = {f"p{p}": round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000, 1)
+              for p in points}
+    result["max"] = round(ordered[-1] * 1000, 1)
+    return result
+
+
+class CompileService:
+    """
+    Runs compile requests on a bounded thread pool. At most `workers`
+    compiles run at once and `max_queue` more may wait; further requests
+    are rejected. Requests with the same name share a run directory (and
+    its plot/AST caches) and run one after another. Unnamed requests get
+    run_NNNNNN directories, of which the newest `keep_runs` are kept.
+    """
+    def __init__(self, runs_dir="server_runs", workers=4, max_queue=32, history=1000, keep_runs=100):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.runs_dir = os.path.abspath(runs_dir)
+        self.keep_runs = max(1, keep_runs)
+        # Unnamed runs left by earlier sessions count towards keep_runs
+        numbers = sorted(int(m.group(1)) for m in map(UNNAMED_RUN.match, os.listdir(self.runs_dir))
+                         if m) if os.path.isdir(self.runs_dir) else []
+        self.unnamed = deque(f"run_{n:06d}" for n in numbers)
+        self.unnamed_count = numbers[-1] if numbers else 0
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="compile")
+        self.slots = threading.BoundedSemaphore(workers + max_queue)
+        self.lock = threading.Lock()
+        self.name_locks = {}
+        self.latencies = deque(maxlen=history)
+        self.queue_waits = deque(maxlen=history)
+        self.requests = 0
+        self.failed = 0
+        self.rejected = 0
+        self.in_flight = 0
+
+    def warm_up(self):
+        """
+        Imports the heavy libraries and builds the mapper and parser.
+        """
+        import matplotlib
+        matplotlib.use("Agg")
+        import seaborn  # noqa: F401
+        import compiler_core
+
+        compiler_core.warm_up()
+
+    def _name_lock(self, name):
+        with self.lock:
+            return self.name_locks.setdefault(name, threading.Lock())
+
+    def _run(self, code, name, options, received):
+        import compiler_core
+
+        started = time.perf_counter()
+        with self._name_lock(name):
+            result = compiler_core.compile_run(code, os.path.join(self.runs_dir, name), **options)
+        response = dict(vars(result))
+        response["queue_ms"] = round((started - received) * 1000, 1)
+        return response
+
+    def _unnamed_run(self):
+        # Called with self.lock held; removes the oldest unnamed runs
+        self.unnamed_count += 1
+        name = f"run_{self.unnamed_count:06d}"
+        self.unnamed.append(name)
+        while len(self.unnamed) > self.keep_runs:
+            shutil.rmtree(os.path.join(self.runs_dir, self.unnamed.popleft()), ignore_errors=True)
+        return name
+
+    def submit(self, request):
+        """
+        Runs one request and waits for it.
+
+        Returns:
+            dict: the response, or None when the queue is full
+
+        Raises:
+            ValueError: see check_request
+        """
+        received = time.perf_counter()
+        check_request(request)
+        name = request.get("name")
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            return None
+        with self.lock:
+            self.requests += 1
+            self.in_flight += 1
+            name = name or self._unnamed_run()
+        try:
+            options = {"plot_workers": 1}
+            options.update({k: v for k, v in request.get("options", {}).items() if k in REQUEST_OPTIONS})
+            # Resolved per compile: os.chdir would move every worker thread
+            options["base_dir"] = request.get("cwd")
+            response = self.pool.submit(self._run, request["code"], name, options, received).result()
+        finally:
+            self.slots.release()
+            with self.lock:
+                self.in_flight -= 1
+
+        latency = time.perf_counter() - received
+        response["latency_ms"] = round(latency * 1000, 1)
+        with self.lock:
+            self.latencies.append(latency)
+            self.queue_waits.append(response["queue_ms"] / 1000)
+            self.failed += not response["success"]
+        return response
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "in_flight": self.in_flight,
+                "latency_ms": percentiles(list(self.latencies)),
+                "queue_ms": percentiles(list(self.queue_waits)),
+            }
+
+
+def make_handler(service):
+    from http.server import BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._reply(200, service.stats())
+            elif self.path == "/health":
+                self._reply(200, {"status": "ok"})
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/compile":
+                self._reply(404, {"error": "not found"})
+                return
+            # Browsers send cross-origin "simple" POSTs without a preflight;
+            # those can't be application/json, and they carry an Origin
+            origin = self.headers.get("Origin")
+            if (origin is not None and not is_local(origin)) or not is_local(self.headers.get("Host", "")):
+                self._reply(403, {"error": "only local clients may compile"})
+                return
+            content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if content_type != "application/json":
+                self._reply(415, {"error": "Content-Type must be application/json"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length).decode("utf-8"))
+                check_request(request)
+            except ValueError as e:
+                self._reply(400, {"error": str(e)})
+                return
+            response = service.submit(request)
+            if response is None:
+                self._reply(503, {"error": "queue full"})
+            else:
+                self._reply(200, response)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(port=DEFAULT_PORT, workers=4, max_queue=32, runs_dir="server_runs", keep_runs=100):
+    from http.server import ThreadingHTTPServer
+
+    service = CompileService(runs_dir, workers, max_queue, keep_runs=keep_runs)
+    start = time.perf_counter()
+    service.warm_up()
+    print(f"Warmed up in {time.perf_counter() - start:.2f} s")
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(service))
+    print(f"Serving on http://127.0.0.1:{port} ({workers} workers, queue {max_queue})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.pool.shutdown(wait=False)
+
+
+# =====================================================
+# 2. Client
+# =====================================================
+
+def request(url, path, payload=None, timeout=3600):
+    from urllib.request import Request, urlopen
+    from urllib.error import HTTPError
+
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req = Request(url.rstrip("/") + path, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urlopen(req, timeout=timeout) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+    except HTTPError as e:
+        return json.loads(e.read().decode("utf-8"))
+
+
+def submit(url, script, name=None, quiet=False):
+    with open(script, "r", encoding="utf-8") as f:
+        code = f.read()
+    response = request(url, "/compile", {"code": code, "name": name, "cwd": os.getcwd()})
+    if "success" not in response:
+        print(f"Server error: {response.get('error')}")
+        return 2
+    if not quiet:
+        print(response["log"])
+    print(f"{'ok' if response['success'] else 'FAILED'} in {response['latency_ms']} ms "
+          f"(queued {response['queue_ms']} ms), output: {response['run_dir']}")
+    return 0 if response["success"] else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm DSL compile daemon and its client.")
+    parser.add_argument("--url", default=f"http://127.0.0.1:{DEFAULT_PORT}")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_cmd = commands.add_parser("serve", help="start the daemon")
+    serve_cmd.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_cmd.add_argument("--workers", type=int, default=4, help="compiles running at once")
+    serve_cmd.add_argument("--max-queue", type=int, default=32, help="requests allowed to wait")
+    serve_cmd.add_argument("--runs-dir", default="server_runs")
+    serve_cmd.add_argument("--keep-runs", type=int, default=100, help="unnamed run directories kept")
+
+    submit_cmd = commands.add_parser("submit", help="compile and run a script on the daemon")
+    submit_cmd.add_argument("script")
+    submit_cmd.add_argument("--name", help="run directory name (reuses its caches)")
+    submit_cmd.add_argument("--quiet", action="store_true", help="only print the status line")
+
+    commands.add_parser("stats", help="print request counts and latency percentiles")
+
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        serve(args.port, args.workers, args.max_queue, args.runs_dir, args.keep_runs)
+        return 0
+    if args.command == "submit":
+        return submit(args.url, args.script, args.name, args.quiet)
+    print(json.dumps(request(args.url, "/stats"), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())